@@ -0,0 +1,35 @@
+// Show/hide animation for the Gamba analysis footer, registered as Dash clientside callbacks.
+// Visibility lives in two body classes styled in style.css, so no footer elements are touched here.
+
+function setFooterOpen(open) {
+    // Switch both classes in the next frame - the CSS transitions do the rest
+    requestAnimationFrame(function() {
+        document.body.classList.toggle('footer-open', open);
+        document.body.classList.toggle('footer-dismissed', !open);
+    });
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    footer: {
+        // Close hides the footer, Show brings it back
+        buttons: function(close_clicks, show_clicks) {
+            // Determine which button was clicked
+            const ctx = window.dash_clientside.callback_context;
+            if (!ctx.triggered.length) {
+                return window.dash_clientside.no_update;
+            }
+
+            const propId = ctx.triggered[0].prop_id;
+            setFooterOpen(propId.substring(0, propId.lastIndexOf('.')) === 'show-analysis-btn');
+            return window.dash_clientside.no_update;
+        },
+
+        // A new analysis or message opens the footer (analysis-present flag set by the server)
+        analysis: function(present) {
+            if (present) {
+                setFooterOpen(true);
+            }
+            return window.dash_clientside.no_update;
+        }
+    }
+});
@@ -0,0 +1,17 @@
+"""
+Gunicorn settings, picked up automatically when running:
+    gunicorn poe_gem_calculator_dash:server
+
+A single worker process is deliberate - prices, the refresh thread and the trade API
+rate limiter all live in module globals, so extra workers would each reload prices,
+multiply trade API traffic and not see each other's upgrades. Threads give the
+concurrency instead: slow Gamba lookups no longer block the progress poll or table updates.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"  # Render uses port 10000 by default
+workers = 1
+worker_class = 'gthread'
+threads = 8
+timeout = 120  # Corruption analysis can wait out trade API rate limits
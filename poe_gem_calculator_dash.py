@@ -10,221 +10,437 @@ Changes from V1:
 """
 
 import requests
+import orjson
+import diskcache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import dash
-from dash import dcc, html, Input, Output, State, dash_table, callback_context
+from dash import dcc, html, Input, Output, State, ClientsideFunction, dash_table, callback_context
+from dash.exceptions import PreventUpdate
+from dash.dash_table.Format import Format, Scheme, Symbol
 import dash_bootstrap_components as dbc
+import plotly.io as pio
+from plotly.io.json import to_json_plotly
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import threading
 import time
+import random
 import os
+import sys
+import shutil
+import logging
+import functools
+from collections import deque, defaultdict
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Running this file directly hands the process to gunicorn (settings in gunicorn.conf.py) before any
+# prices or layout are built - gunicorn imports the module itself. DASH_DEV, Windows or a missing
+# gunicorn fall back to the threaded Flask server at the bottom of this file.
+GUNICORN = shutil.which('gunicorn') if os.name != 'nt' else None
+if __name__ == '__main__' and GUNICORN and not os.environ.get('DASH_DEV'):
+    APP_DIR = os.path.dirname(os.path.abspath(__file__))
+    print(f"Starting PoE Gem Profit Calculator under gunicorn on port {os.environ.get('PORT', '10000')}...")
+    sys.stdout.flush()
+    os.execv(GUNICORN, [GUNICORN, '--chdir', APP_DIR, '-c', os.path.join(APP_DIR, 'gunicorn.conf.py'),
+                        'poe_gem_calculator_dash:server'])
+
+# Per-request trade chatter goes out at DEBUG; run with POE_LOG=DEBUG to see it
+logging.basicConfig(level=os.environ.get('POE_LOG', 'INFO').upper(), format='%(message)s')
+logger = logging.getLogger('poe_gem')
+
+# Dash encodes every callback response with plotly's JSON helper; orjson is much faster than stdlib json
+pio.json.config.default_engine = 'orjson'
+
+def ttl_cache(seconds):
+    """Cache a no-argument method's result on the instance for the given number of seconds
+
+    Failures are only left uncached when the method raises, so keep it off methods that return fallbacks.
+    """
+    def decorator(func):
+        attr = f'_ttl_cache_{func.__name__}'
+        
+        @functools.wraps(func)
+        def wrapper(self):
+            cached = getattr(self, attr, None)
+            if cached and time.time() - cached[0] < seconds:
+                return cached[1]
+            value = func(self)
+            setattr(self, attr, (time.time(), value))
+            return value
+        return wrapper
+    return decorator
+
+# Persistent cache so restarts and redeploys don't start with a storm of API calls
+cache = diskcache.Cache(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.poe_cache'))
+
+def disk_cached(expire, tag=None):
+    """Persist a method's non-None results in the disk cache, keyed by league and arguments
+
+    Entries carry the given tag so a manual refresh can evict them with cache.evict(tag).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            # __qualname__ keeps same-named methods of different classes apart
+            key = (func.__qualname__, self.league, *args, *sorted(kwargs.items()))
+            value = cache.get(key)
+            if value is not None:
+                return value
+            value = func(self, *args, **kwargs)
+            if value is not None:
+                cache.set(key, value, expire=expire, tag=tag)
+            return value
+        return wrapper
+    return decorator
+
+def _trade_url_template(level, quality, corrupted):
+    """Trade site search URL for one gem level/quality, pre-encoded with {league} and {gem} left to fill"""
+    query = {'query': {
+        'status': {'option': 'available'},
+        'type': '',
+        'filters': {'misc_filters': {'filters': {
+            'gem_level': {'min': level, 'max': level},
+            'quality': {'min': quality, 'max': quality},
+            'corrupted': {'option': 'true' if corrupted else 'false'}
+        }}}
+    }}
+    # Split the compact JSON around the empty gem name so only the name is encoded per link
+    head, tail = orjson.dumps(query).decode().split('"type":""', 1)
+    # quote() encodes the JSON braces, so the only literal braces left are the format fields
+    return ('https://www.pathofexile.com/trade/search/{league}?q='
+            + quote(head + '"type":"', safe='') + '{gem}' + quote('"' + tail, safe=''))
+
+TRADE_URL_L1Q0 = _trade_url_template(1, 0, False)
+TRADE_URL_L5Q20 = _trade_url_template(5, 20, False)
+TRADE_URL_L5Q20_CORRUPTED = _trade_url_template(5, 20, True)
+TRADE_URL_L6Q20_CORRUPTED = _trade_url_template(6, 20, True)
+
+def trade_search_url(template, league, gem_name):
+    """Fill a TRADE_URL_* template for a gem"""
+    # The name sits inside a JSON string, so escape it for JSON before URL-encoding
+    return template.format(league=quote(league, safe=''), gem=quote(orjson.dumps(gem_name).decode()[1:-1], safe=''))
+
+class TradeRateLimiter:
+    """Sliding-window limiter for one trade API endpoint, tuned by GGG's rate limit headers"""
+    FULL_WINDOW_BACKOFF = 2.0  # Seconds to pause when GGG reports a window at its cap without a penalty
+    
+    def __init__(self, rules):
+        self.rules = rules  # [(max_requests, period_seconds), ...]
+        self.sent = deque()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        """Block until another request fits inside every window"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                longest = max(period for _, period in self.rules)
+                while self.sent and now - self.sent[0] >= longest:
+                    self.sent.popleft()
+                
+                delay = self.blocked_until - now
+                for max_requests, period in self.rules:
+                    in_window = [t for t in self.sent if now - t < period]
+                    if len(in_window) >= max_requests:
+                        delay = max(delay, period - (now - in_window[0]))
+                if delay <= 0:
+                    self.sent.append(now)
+                    return
+            time.sleep(delay)
+    
+    def update_from_headers(self, headers):
+        """Adopt the limits GGG advertises and pause when its counters show the cap or a penalty
+        
+        X-Rate-Limit-Ip is "max:period:penalty,..." and X-Rate-Limit-Ip-State is "hits:period:active_penalty,...".
+        """
+        rules = headers.get('X-Rate-Limit-Ip')
+        state = headers.get('X-Rate-Limit-Ip-State')
+        if not rules or not state:
+            return
+        try:
+            rules = [tuple(int(x) for x in rule.split(':')) for rule in rules.split(',')]
+            state = [tuple(int(x) for x in rule.split(':')) for rule in state.split(',')]
+        except ValueError:
+            return
+        
+        with self.lock:
+            self.rules = [(max_requests, period) for max_requests, period, _ in rules]
+            now = time.monotonic()
+            for (max_requests, period, _), (hits, _, penalty) in zip(rules, state):
+                if penalty > 0:
+                    self.blocked_until = max(self.blocked_until, now + penalty)
+                elif hits >= max_requests:
+                    # At the cap with no way to tell when GGG's oldest hit expires - back off briefly
+                    # and let our own window plus any 429 Retry-After handle the rest
+                    self.blocked_until = max(self.blocked_until, now + min(period, self.FULL_WINDOW_BACKOFF))
 
 class SimplePoeAPI:
     """Simplified API client for Dash version"""
+    # Trade search body, pre-encoded so each lookup is a single bytes substitution.
+    # Slots: JSON-encoded gem name, level min/max, quality min/max, optional corrupted filter.
+    SEARCH_TEMPLATE = (
+        b'{"query":{"status":{"option":"available"},"type":%s,'
+        b'"filters":{"misc_filters":{"filters":{"gem_level":{"min":%d,"max":%d},'
+        b'"quality":{"min":%d,"max":%d}%s}}}},"sort":{"price":"asc"}}'
+    )
+    CORRUPTED_FILTERS = {
+        True: b',"corrupted":{"option":"true"}',
+        False: b',"corrupted":{"option":"false"}',
+        None: b''
+    }
+    FETCH_LIMIT = 10  # Most listing ids the trade fetch endpoint accepts per request
+    NINJA_PRICE_POINTS = frozenset([(1, 0), (5, 20)])  # (level, quality) of the gems we buy and sell
+    
     def __init__(self, league=None):
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'PoE-Gem-Profit-Calculator/2.0'
+            'User-Agent': 'PoE-Gem-Profit-Calculator/2.0',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
         })
+        # Keep enough pooled connections per host for the parallel trade lookups.
+        # 429s are not retried here - the trade methods handle those with their own backoff.
+        adapter = HTTPAdapter(
+            pool_connections=50,
+            pool_maxsize=50,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        # Caps concurrent trade API requests so parallel lookups stay under GGG's rate limit
+        self.trade_slots = threading.BoundedSemaphore(4)
+        # Search and fetch are separate rate limit policies on GGG's side. These start at the
+        # usual published limits and are replaced by whatever the API advertises in its headers.
+        self.trade_limiters = {
+            'search': TradeRateLimiter([(5, 10), (15, 60), (30, 300)]),
+            'fetch': TradeRateLimiter([(12, 4), (16, 12)])
+        }
         self.league = league or self.get_current_league()
     
     def get_current_league(self):
-        """Auto-detect current challenge league from poe.ninja"""
+        """Auto-detect current challenge league from poe.ninja (remembered on disk for a day)"""
+        league = cache.get('league')
+        if league:
+            logger.info('Selected league: %s (cached)', league)
+            return league
+        
         try:
-            url = "https://poe.ninja/api/data/currencyoverview?league=Keepers&type=Currency"
-            response = self.session.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                print("✓ Selected league: Keepers")
-                return "Keepers"
+            candidates = ["Keepers", "Settlers", "Affliction", "Ancestor", "Crucible"]
+            # Check every candidate at once, then take the first available in priority order
+            with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+                available = list(executor.map(self._league_available, candidates))
             
-            for league_name in ["Settlers", "Affliction", "Ancestor", "Crucible"]:
-                url = f"https://poe.ninja/api/data/currencyoverview?league={league_name}&type=Currency"
-                response = self.session.get(url, timeout=10)
-                if response.status_code == 200:
-                    print(f"✓ Selected league: {league_name}")
+            for league_name, is_available in zip(candidates, available):
+                if is_available:
+                    logger.info('Selected league: %s', league_name)
+                    cache.set('league', league_name, expire=86400)
                     return league_name
             
-            print("WARNING: No challenge league found, using Standard")
+            if all(is_available is None for is_available in available):
+                # poe.ninja unreachable (e.g. no network at boot) - not the same as no league having data
+                logger.error('Could not reach poe.ninja to detect the league - using default: Keepers')
+                return "Keepers"
+            
+            logger.warning('No challenge league found, using Standard')
             return "Standard"
             
         except Exception as e:
-            print(f"Error detecting league: {e}")
-            print("Using default: Keepers")
+            logger.error('Error detecting league: %s - using default: Keepers', e)
             return "Keepers"
     
+    def _league_available(self, league_name):
+        """Check poe.ninja has data for a league without downloading the overview body (None if the check errored)"""
+        url = f"https://poe.ninja/api/data/currencyoverview?league={league_name}&type=Currency"
+        try:
+            response = self.session.head(url, timeout=5, allow_redirects=True)
+            if response.status_code == 405:
+                # HEAD not allowed - fall back to a normal request
+                response = self.session.get(url, timeout=10)
+        except requests.RequestException as e:
+            # A dead or slow league must not discard the answers for the others
+            logger.debug('League check for %s failed: %s', league_name, e)
+            return None
+        return response.status_code == 200
+    
+    @staticmethod
+    def _retry_delay(response, attempt):
+        """Seconds to wait before retrying a rate-limited request: GGG's Retry-After if sent, else capped backoff"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return int(retry_after)
+        return min(10, 2 ** attempt) + random.uniform(0, 1)
+    
+    def clear_price_caches(self):
+        """Forget cached poe.ninja, currency and trade prices so the next lookups hit the APIs"""
+        cache.evict('ninja')
+        cache.evict('trade_price')
+        for attr in [name for name in vars(self) if name.startswith('_ttl_cache_')]:
+            delattr(self, attr)
+    
+    def _trade_request(self, method, url, **kwargs):
+        """Send a trade API request through the shared concurrency cap and its endpoint's rate limiter"""
+        limiter = self.trade_limiters['search' if method == 'POST' else 'fetch']
+        # Wait for the endpoint's budget before taking a slot, so requests blocked on one
+        # endpoint never hold slots the other endpoint could be using
+        limiter.wait()
+        with self.trade_slots:
+            response = self.session.request(method, url, **kwargs)
+        limiter.update_from_headers(response.headers)
+        return response
+    
+    @disk_cached(600, tag='ninja')
+    def _ninja_lines(self, overview, overview_type):
+        """Raw 'lines' of a poe.ninja overview, persisted so restarts don't re-download them"""
+        url = f"https://poe.ninja/api/data/{overview}?league={self.league}&type={overview_type}"
+        response = self.session.get(url, timeout=10)
+        response.raise_for_status()  # Never cache an error page
+        return orjson.loads(response.content).get('lines', [])
+    
+    @ttl_cache(300)
+    def _currency_lines(self):
+        """poe.ninja currency overview lines by currency name, shared by the divine rate and currency lookups"""
+        return {item.get('currencyTypeName'): item for item in self._ninja_lines('currencyoverview', 'Currency')}
+    
     def get_divine_chaos_rate(self):
         """Get Divine Orb price from poe.ninja"""
         try:
-            url = f"https://poe.ninja/api/data/currencyoverview?league={self.league}&type=Currency"
-            response = self.session.get(url, timeout=10)
-            data = response.json()
-            for item in data.get('lines', []):
-                if item.get('currencyTypeName') == 'Divine Orb':
-                    return item.get('chaosEquivalent', 100.0)
+            divine = self._currency_lines().get('Divine Orb')
+            return divine.get('chaosEquivalent', 100.0) if divine else 100.0
+        except (requests.RequestException, ValueError) as e:
+            logger.warning('Error getting divine rate: %s', e)
             return 100.0
-        except:
-            return 100.0
-    
-    def get_awakened_gem_list(self):
-        """Get list of awakened gem names from poe.ninja (we only use this for the list, not prices)"""
-        try:
-            url = f"https://poe.ninja/api/data/itemoverview?league={self.league}&type=SkillGem"
-            response = self.session.get(url, timeout=10)
-            data = response.json()
-            gems = set()
-            for gem in data.get('lines', []):
-                name = gem.get('name', '')
-                if 'Awakened' in name:
-                    gems.add(name)
-            return sorted(list(gems))
-        except Exception as e:
-            print(f"Error getting gem list: {e}")
-            return []
     
     def get_awakened_gem_prices(self):
-        """Get all awakened gem price data from poe.ninja"""
+        """Get awakened gem L1 Q0 / L5 Q20 prices from poe.ninja as a chaos Series indexed by (name, level, quality)"""
+        empty = pd.Series(dtype=float, index=pd.MultiIndex.from_tuples([], names=['name', 'gemLevel', 'gemQuality']))
         try:
-            url = f"https://poe.ninja/api/data/itemoverview?league={self.league}&type=SkillGem"
-            response = self.session.get(url, timeout=10)
-            data = response.json()
-            gems = {}
-            level_quality_combos = {}  # Track what combos we see
-            
-            for gem in data.get('lines', []):
-                name = gem.get('name', '')
-                if 'Awakened' in name:
-                    level = gem.get('gemLevel', 0)
-                    quality = gem.get('gemQuality', 0)
-                    key = f"{name}_L{level}_Q{quality}"
-                    gems[key] = {
-                        'name': name,
-                        'level': level,
-                        'quality': quality,
-                        'chaos_value': gem.get('chaosValue', 0)
-                    }
-                    
-                    # Track combos
-                    combo = f"L{level}_Q{quality}"
-                    level_quality_combos[combo] = level_quality_combos.get(combo, 0) + 1
-            
-            print(f"\nLevel/Quality combinations found on poe.ninja:")
-            for combo, count in sorted(level_quality_combos.items()):
-                print(f"  {combo}: {count} gems")
+            df = pd.json_normalize(self._ninja_lines('itemoverview', 'SkillGem'))
+            if df.empty:
+                return empty
+            df = df.reindex(columns=['name', 'gemLevel', 'gemQuality', 'chaosValue'])
+            df = df[df['name'].str.contains('Awakened', na=False)].copy()
+            df[['gemLevel', 'gemQuality']] = df[['gemLevel', 'gemQuality']].fillna(0).astype(int)
+            # Only the buy and sell price points are ever read - drop every other level/quality
+            price_points = pd.MultiIndex.from_arrays([df['gemLevel'], df['gemQuality']])
+            df = df[price_points.isin(self.NINJA_PRICE_POINTS)]
+            df['chaosValue'] = df['chaosValue'].fillna(0).astype(float)
             
+            gems = df.set_index(['name', 'gemLevel', 'gemQuality'])['chaosValue']
+            # Later listings for the same gem/level/quality win, as they did with the old dict keys
+            gems = gems[~gems.index.duplicated(keep='last')]
             return gems
         except Exception as e:
-            print(f"Error getting gem prices: {e}")
-            return {}
+            logger.warning('Error getting gem prices: %s', e)
+            return empty
     
     def get_currency_prices(self):
         """Get currency and beast prices from poe.ninja"""
         try:
-            url = f"https://poe.ninja/api/data/currencyoverview?league={self.league}&type=Currency"
-            response = self.session.get(url, timeout=10)
-            data = response.json()
+            lines = self._currency_lines()
             prices = {}
             currency_map = {
                 "Gemcutter's Prism": 'gcp',
                 "Vaal Orb": 'vaal'
             }
-            for item in data.get('lines', []):
-                name = item.get('currencyTypeName')
-                if name in currency_map:
-                    prices[currency_map[name]] = item.get('chaosEquivalent', 0)
+            for name, key in currency_map.items():
+                if name in lines:
+                    prices[key] = lines[name].get('chaosEquivalent', 0)
             
             # Get beast price
-            beast_url = f"https://poe.ninja/api/data/itemoverview?league={self.league}&type=Beast"
-            response = self.session.get(beast_url, timeout=10)
-            data = response.json()
-            for item in data.get('lines', []):
+            for item in self._ninja_lines('itemoverview', 'Beast'):
                 if 'Wild Brambleback' in item.get('name', ''):
                     prices['brambleback'] = item.get('chaosValue', 0)
                     break
             
             return prices
-        except:
+        except (requests.RequestException, ValueError) as e:
+            logger.warning('Error getting currency prices: %s', e)
             return {'gcp': 1, 'vaal': 1, 'brambleback': 10}
     
+    @disk_cached(300, tag='trade_price')
     def get_trade_site_gem_price(self, gem_name, level, quality, corrupted=False):
-        """Fetch gem price from trade site with retry logic for rate limiting"""
+        """Fetch gem price from trade site for an exact level/quality"""
+        return self._fetch_gem_price(gem_name, level, quality, quality, corrupted)
+    
+    @disk_cached(300, tag='trade_price')
+    def get_trade_site_gem_price_corrupted(self, gem_name, level, quality_min, quality_max):
+        """Fetch corrupted gem price from trade site for a quality range (for corruption analysis)"""
+        return self._fetch_gem_price(gem_name, level, quality_min, quality_max, True)
+    
+    def _fetch_gem_price(self, gem_name, level, quality_min, quality_max, corrupted):
+        """Average of the 5 cheapest trade listings, with retry logic for rate limiting
+        
+        corrupted=None leaves the corrupted filter off the search entirely.
+        """
         max_retries = 3
-        retry_delay = 1  # Start with 1 second
+        
+        search_payload = self.SEARCH_TEMPLATE % (
+            orjson.dumps(gem_name), level, level, quality_min, quality_max, self.CORRUPTED_FILTERS[corrupted]
+        )
+        search_url = f"https://www.pathofexile.com/api/trade/search/{self.league}"
         
         for attempt in range(max_retries):
             try:
-                search_payload = {
-                    "query": {
-                        "status": {"option": "available"},
-                        "type": gem_name,
-                        "filters": {
-                            "misc_filters": {
-                                "filters": {
-                                    "gem_level": {"min": level, "max": level},
-                                    "quality": {"min": quality, "max": quality},
-                                    "corrupted": {"option": "true" if corrupted else "false"}
-                                }
-                            }
-                        }
-                    },
-                    "sort": {"price": "asc"}
-                }
-                
-                search_url = f"https://www.pathofexile.com/api/trade/search/{self.league}"
-                print(f"    Sending search request to trade API...")
-                search_response = self.session.post(search_url, json=search_payload, timeout=20)
+                logger.debug('    Sending search request to trade API for %s L%d...', gem_name, level)
+                search_response = self._trade_request('POST', search_url, data=search_payload,
+                                                      headers={'Content-Type': 'application/json'}, timeout=20)
                 
                 if search_response.status_code == 429:
                     # Rate limited - wait and retry
                     if attempt < max_retries - 1:
-                        wait_time = retry_delay * (2 ** attempt)  # Exponential backoff: 1s, 2s, 4s
-                        print(f"    Rate limited (429), waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
+                        wait_time = self._retry_delay(search_response, attempt)
+                        logger.warning('    Rate limited (429), waiting %.1fs before retry %d/%d', wait_time, attempt + 1, max_retries)
                         time.sleep(wait_time)
                         continue
                     else:
-                        print(f"    Rate limited after {max_retries} attempts, skipping")
+                        logger.warning('    Rate limited after %d attempts, skipping', max_retries)
                         return None
                 
                 if search_response.status_code != 200:
-                    print(f"    Trade API returned status {search_response.status_code}")
+                    logger.warning('    Trade API returned status %d', search_response.status_code)
                     return None
                 
-                search_data = search_response.json()
-                result_ids = search_data.get('result', [])[:5]
+                search_data = orjson.loads(search_response.content)
+                # One fetch call takes up to 10 ids - extra listings cover any without a usable price
+                result_ids = search_data.get('result', [])[:self.FETCH_LIMIT]
                 
                 if not result_ids:
-                    print(f"    No results found")
+                    logger.debug('    No results found')
                     return None
                 
-                print(f"    Found {len(result_ids)} listings")
+                logger.debug('    Found %d listings', len(result_ids))
                 
-                # Add delay before fetch request
-                time.sleep(0.3)
-                
-                fetch_url = f"https://www.pathofexile.com/api/trade/fetch/{','.join(result_ids[:5])}?query={search_data.get('id')}"
-                print(f"    Fetching listing details...")
-                fetch_response = self.session.get(fetch_url, timeout=20)
+                fetch_url = f"https://www.pathofexile.com/api/trade/fetch/{','.join(result_ids)}?query={search_data.get('id')}"
+                logger.debug('    Fetching listing details...')
+                fetch_response = self._trade_request('GET', fetch_url, timeout=20)
                 
                 if fetch_response.status_code == 429:
                     # Rate limited on fetch
                     if attempt < max_retries - 1:
-                        wait_time = retry_delay * (2 ** attempt)
-                        print(f"    Rate limited on fetch (429), waiting {wait_time}s before retry")
+                        wait_time = self._retry_delay(fetch_response, attempt)
+                        logger.warning('    Rate limited on fetch (429), waiting %.1fs before retry', wait_time)
                         time.sleep(wait_time)
                         continue
                     else:
-                        print(f"    Rate limited on fetch after {max_retries} attempts, skipping")
+                        logger.warning('    Rate limited on fetch after %d attempts, skipping', max_retries)
                         return None
                 
                 if fetch_response.status_code != 200:
-                    print(f"    Fetch API returned status {fetch_response.status_code}")
+                    logger.warning('    Fetch API returned status %d', fetch_response.status_code)
                     return None
                 
-                fetch_data = fetch_response.json()
+                fetch_data = orjson.loads(fetch_response.content)
                 results = fetch_data.get('result', [])
+                divine_rate = None  # Only looked up if a listing is actually priced in divines
                 
                 prices = []
                 for item in results:
+                    # Listings removed since the search come back as null entries
+                    if not item:
+                        continue
                     listing = item.get('listing', {})
                     price_data = listing.get('price', {})
                     
@@ -235,124 +451,91 @@ class SimplePoeAPI:
                         if currency == 'chaos':
                             prices.append(amount)
                         elif currency == 'divine':
-                            divine_rate = self.get_divine_chaos_rate()
+                            if divine_rate is None:
+                                divine_rate = self.get_divine_chaos_rate()
                             prices.append(amount * divine_rate)
                 
                 if prices:
                     prices.sort()
                     avg_price = sum(prices[:5]) / min(5, len(prices))
-                    print(f"    ✓ Average price: {avg_price:.1f}c (from {len(prices)} listings)")
+                    logger.debug('    ✓ Average price: %.1fc (from %d listings)', avg_price, len(prices))
                     return avg_price
                 
-                print(f"    No valid prices found in listings")
+                logger.debug('    No valid prices found in listings')
                 return None
                 
-            except Exception as e:
-                print(f"    ✗ Error fetching trade price: {e}")
+            except requests.RequestException as e:
+                # Connection errors and timeouts are transient - back off and try again
+                logger.warning('    ✗ Error fetching trade price: %s', e)
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (2 ** attempt))
+                    time.sleep(self._retry_delay(None, attempt))
                     continue
                 return None
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # Malformed JSON or an unexpected response shape won't fix itself on a retry
+                logger.warning('    ✗ Unreadable trade API response: %s', e)
+                return None
         
         return None
-    
-    def get_trade_site_gem_price_corrupted(self, gem_name, level, quality_min, quality_max):
-        """Fetch corrupted gem price from trade site (for corruption analysis)"""
-        try:
-            search_payload = {
-                "query": {
-                    "status": {"option": "available"},
-                    "type": gem_name,
-                    "filters": {
-                        "misc_filters": {
-                            "filters": {
-                                "gem_level": {"min": level, "max": level},
-                                "quality": {"min": quality_min, "max": quality_max},
-                                "corrupted": {"option": "true"}
-                            }
-                        }
-                    }
-                },
-                "sort": {"price": "asc"}
-            }
-            
-            search_url = f"https://www.pathofexile.com/api/trade/search/{self.league}"
-            search_response = self.session.post(search_url, json=search_payload, timeout=10)
-            
-            if search_response.status_code != 200:
-                return None
-            
-            search_data = search_response.json()
-            result_ids = search_data.get('result', [])[:10]
-            
-            if not result_ids:
-                return None
-            
-            fetch_url = f"https://www.pathofexile.com/api/trade/fetch/{','.join(result_ids[:10])}?query={search_data.get('id')}"
-            fetch_response = self.session.get(fetch_url, timeout=10)
-            
-            if fetch_response.status_code != 200:
-                return None
-            
-            fetch_data = fetch_response.json()
-            results = fetch_data.get('result', [])
-            
-            prices = []
-            for item in results:
-                listing = item.get('listing', {})
-                price_data = listing.get('price', {})
-                
-                if price_data:
-                    amount = price_data.get('amount', 0)
-                    currency = price_data.get('currency', '')
-                    
-                    if currency == 'chaos':
-                        prices.append(amount)
-                    elif currency == 'divine':
-                        divine_rate = self.get_divine_chaos_rate()
-                        prices.append(amount * divine_rate)
-            
-            if prices:
-                prices.sort()
-                return sum(prices[:5]) / min(5, len(prices))
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error fetching corrupted trade price: {e}")
-            return None
+
+
+# Chance of each corruption outcome for a L5 Q20 gem, in the order they are summed
+CORRUPTION_OUTCOME_WEIGHTS = {
+    'l5_no_change': 0.333,
+    'l6': 0.167,
+    'l4': 0.167,
+    'quality_up': 0.167,
+    'quality_down': 0.167
+}
+
+def corruption_ev(outcomes, base_total_cost, vaal_cost):
+    """EV price, total cost, profit and ROI% of vaaling a gem, given the price of each outcome"""
+    ev_price = sum(weight * outcomes[key] for key, weight in CORRUPTION_OUTCOME_WEIGHTS.items())
+    ev_total_cost = base_total_cost + vaal_cost
+    ev_profit = ev_price - ev_total_cost
+    ev_percent = (ev_profit / ev_total_cost * 100) if ev_total_cost > 0 else 0
+    return ev_price, ev_total_cost, ev_profit, ev_percent
 
 
 class GemProfitCalculator:
     """Calculate profit for awakened gem flipping"""
     def __init__(self, api):
         self.api = api
-        self.currency_prices = api.get_currency_prices()
-        self.divine_rate = api.get_divine_chaos_rate()
+        self.refresh_currency()
+    
+    def refresh_currency(self):
+        """Re-read currency, beast and divine prices (the API caches them for 5 minutes)"""
+        self.currency_prices = self.api.get_currency_prices()
+        self.divine_rate = self.api.get_divine_chaos_rate()
+    
+    def get_upgrade_costs(self):
+        """Leveling (4 Wild Bramblebacks) and quality (20 GCP) cost to take a gem from L1 Q0 to L5 Q20"""
+        leveling_cost = 4 * self.currency_prices.get('brambleback', 10)
+        quality_cost = 20 * self.currency_prices.get('gcp', 1)
+        return leveling_cost, quality_cost
     
     def calculate_basic_profit(self, gem_name):
         """Calculate basic profit (L1 -> L5 Q20 uncorrupted) using trade site"""
         # Get prices from trade site
-        print(f"  Fetching L1 price for {gem_name}...")
+        logger.debug('  Fetching L1 price for %s...', gem_name)
         l1_price = self.api.get_trade_site_gem_price(gem_name, 1, 0, False)
-        print(f"  L1 price: {l1_price}")
+        logger.debug('  L1 price: %s', l1_price)
         
-        print(f"  Fetching L5 price for {gem_name}...")
+        logger.debug('  Fetching L5 price for %s...', gem_name)
         l5_price = self.api.get_trade_site_gem_price(gem_name, 5, 20, False)
-        print(f"  L5 price: {l5_price}")
+        logger.debug('  L5 price: %s', l5_price)
         
         if l1_price is None or l5_price is None:
-            print(f"  ❌ Skipping {gem_name} - missing price data")
+            logger.info('  ❌ Skipping %s - missing price data', gem_name)
             return None
         
         # Calculate costs
-        leveling_cost = 4 * self.currency_prices.get('brambleback', 10)
-        quality_cost = 20 * self.currency_prices.get('gcp', 1)
+        leveling_cost, quality_cost = self.get_upgrade_costs()
         total_cost = l1_price + leveling_cost + quality_cost
         profit = l5_price - total_cost
         profit_percent = (profit / total_cost * 100) if total_cost > 0 else 0
         
-        print(f"  ✓ Success - Profit: {profit:.1f}c ({profit_percent:.1f}%)")
+        logger.info('  ✓ %s - Profit: %.1fc (%.1f%%)', gem_name, profit, profit_percent)
         
         return {
             'name': gem_name,
@@ -367,31 +550,24 @@ class GemProfitCalculator:
     
     def calculate_corruption_ev(self, gem_name, base_data):
         """Calculate expected value for corruption (only called when toggle is ON)"""
-        # Get corrupted gem prices from trade site
-        l4_price = self.api.get_trade_site_gem_price(gem_name, 4, 20, True)
-        l5_no_change = self.api.get_trade_site_gem_price(gem_name, 5, 20, True)
-        l6_price = self.api.get_trade_site_gem_price(gem_name, 6, 20, True)
-        quality_up = self.api.get_trade_site_gem_price_corrupted(gem_name, 5, 21, 23)
-        quality_down = self.api.get_trade_site_gem_price_corrupted(gem_name, 5, 10, 19)
+        # Get corrupted gem prices from trade site - all five lookups run in parallel
+        outcome_queries = {
+            'l4': (self.api.get_trade_site_gem_price, (gem_name, 4, 20, True)),
+            'l5_no_change': (self.api.get_trade_site_gem_price, (gem_name, 5, 20, True)),
+            'l6': (self.api.get_trade_site_gem_price, (gem_name, 6, 20, True)),
+            'quality_up': (self.api.get_trade_site_gem_price_corrupted, (gem_name, 5, 21, 23)),
+            'quality_down': (self.api.get_trade_site_gem_price_corrupted, (gem_name, 5, 10, 19))
+        }
+        with ThreadPoolExecutor(max_workers=len(outcome_queries)) as executor:
+            futures = {key: executor.submit(fetch, *args) for key, (fetch, args) in outcome_queries.items()}
+            outcomes = {key: future.result() for key, future in futures.items()}
         
         # If any price is missing, return None
-        if None in [l4_price, l5_no_change, l6_price, quality_up, quality_down]:
+        if None in outcomes.values():
             return None
         
         vaal_cost = self.currency_prices.get('vaal', 1)
-        
-        # Calculate EV
-        ev_price = (
-            0.333 * l5_no_change +
-            0.167 * l6_price +
-            0.167 * l4_price +
-            0.167 * quality_up +
-            0.167 * quality_down
-        )
-        
-        ev_total_cost = base_data['total_cost'] + vaal_cost
-        ev_profit = ev_price - ev_total_cost
-        ev_percent = (ev_profit / ev_total_cost * 100) if ev_total_cost > 0 else 0
+        ev_price, ev_total_cost, ev_profit, ev_percent = corruption_ev(outcomes, base_data['total_cost'], vaal_cost)
         
         return {
             'vaal_cost': vaal_cost,
@@ -400,13 +576,7 @@ class GemProfitCalculator:
             'ev_profit': ev_profit,
             'ev_percent': ev_percent,
             'base_profit': base_data['profit'],
-            'outcomes': {
-                'l4': l4_price,
-                'l5_no_change': l5_no_change,
-                'l6': l6_price,
-                'quality_up': quality_up,
-                'quality_down': quality_down
-            }
+            'outcomes': outcomes
         }
 
 
@@ -415,149 +585,239 @@ api = SimplePoeAPI()
 calculator = GemProfitCalculator(api)
 
 # Progress tracking
-loading_progress = {'current': 0, 'total': 0, 'status': 'Loading...', 'complete': False, 'phase': 'ninja'}
+# load_id counts started loads, so two loads ending on identical counts still look different to the browser
+loading_progress = {'current': 0, 'total': 0, 'status': 'Loading...', 'complete': False, 'phase': 'ninja', 'load_id': 0}
 
 def load_gem_prices():
     """Two-phase loading: poe.ninja first, then trade site for top 10"""
-    global profits_data, loading_progress, ninja_data, all_ninja_profits
+    global loading_progress, all_ninja_profits
+    
+    # Pick up current currency prices so upgrade costs and divine display don't go stale
+    calculator.refresh_currency()
     
     # Phase 1: Get all gems from poe.ninja and calculate rough profits
     loading_progress['phase'] = 'ninja'
     loading_progress['status'] = 'Fetching prices from poe.ninja...'
-    print("Phase 1: Fetching all gem prices from poe.ninja...")
+    logger.info('Phase 1: Fetching all gem prices from poe.ninja...')
     
     ninja_gems = api.get_awakened_gem_prices()
-    print(f"Found {len(ninja_gems)} gem entries on poe.ninja")
-    print(f"Sample entries: {list(ninja_gems.keys())[:5]}")
-    
-    # Calculate profit estimates for all gems using poe.ninja
-    ninja_profits = {}
-    for key, gem_data in ninja_gems.items():
-        name = gem_data['name']
-        level = gem_data['level']
-        quality = gem_data['quality']
-        
-        # We need L1 Q0 and L5 Q20
-        if level == 1 and quality == 0:
-            if name not in ninja_profits:
-                ninja_profits[name] = {'name': name}
-            ninja_profits[name]['l1'] = gem_data['chaos_value']
-            print(f"  Found L1 Q0: {name} = {gem_data['chaos_value']}c")
-        elif level == 5 and quality == 20:
-            if name not in ninja_profits:
-                ninja_profits[name] = {'name': name}
-            ninja_profits[name]['l5'] = gem_data['chaos_value']
-            print(f"  Found L5 Q20: {name} = {gem_data['chaos_value']}c")
-    
-    print(f"\nGems with L1 data: {len([g for g in ninja_profits.values() if 'l1' in g])}")
-    print(f"Gems with L5 data: {len([g for g in ninja_profits.values() if 'l5' in g])}")
-    print(f"Gems with both L1 and L5: {len([g for g in ninja_profits.values() if 'l1' in g and 'l5' in g])}")
-    
-    # Calculate ROI% for gems with both L1 and L5 data
-    estimated_profits = []
-    excluded_gems = ['Awakened Enlighten Support', 'Awakened Empower Support', 'Awakened Enhance Support']
-    
-    for name, data in ninja_profits.items():
-        # Skip excluded gems unless we're loading all
-        if data['name'] in excluded_gems:
-            continue
-            
-        if 'l1' in data and 'l5' in data:
-            l1_cost = data['l1']
-            l5_price = data['l5']
-            leveling_cost = 4 * calculator.currency_prices.get('brambleback', 10)
-            quality_cost = 20 * calculator.currency_prices.get('gcp', 1)
-            total_cost = l1_cost + leveling_cost + quality_cost
-            profit = l5_price - total_cost
-            profit_percent = (profit / total_cost * 100) if total_cost > 0 else 0
-            
-            estimated_profits.append({
-                'name': data['name'],
-                'profit_percent': profit_percent,
-                'estimated_profit': profit
-            })
+    logger.info('Found %d gem entries on poe.ninja', len(ninja_gems))
+    
+    # L1 Q0 and L5 Q20 price side by side, one row per gem (NaN where poe.ninja has no listing)
+    level = ninja_gems.index.get_level_values('gemLevel')
+    quality = ninja_gems.index.get_level_values('gemQuality')
+    prices = pd.DataFrame({
+        'l1': ninja_gems[(level == 1) & (quality == 0)].droplevel(['gemLevel', 'gemQuality']),
+        'l5': ninja_gems[(level == 5) & (quality == 20)].droplevel(['gemLevel', 'gemQuality'])
+    })
+    complete = prices.dropna()
+    
+    logger.debug('Gems with L1 data: %d, L5 data: %d, both: %d', prices['l1'].count(), prices['l5'].count(), len(complete))
+    
+    # Estimated profit rows for every complete gem in one vectorized step,
+    # stored globally for the "Load All" feature
+    leveling_cost, quality_cost = calculator.get_upgrade_costs()
+    total_cost = complete['l1'] + leveling_cost + quality_cost
+    profit = complete['l5'] - total_cost
+    all_ninja_profits = pd.DataFrame({
+        'l1_cost': complete['l1'],
+        'leveling_cost': leveling_cost,
+        'quality_cost': quality_cost,
+        'total_cost': total_cost,
+        'l5_price': complete['l5'],
+        'profit': profit,
+        'profit_percent': (profit / total_cost * 100).where(total_cost > 0, 0)
+    }).sort_values('profit_percent', ascending=False)  # Pre-sorted so Load All merges two sorted runs
     
-    print(f"\nTotal gems with complete data for profit calculation: {len(estimated_profits)}")
+    excluded_gems = ['Awakened Enlighten Support', 'Awakened Empower Support', 'Awakened Enhance Support']
+    estimates = all_ninja_profits.drop(excluded_gems, errors='ignore')
     
-    # Store all ninja profits globally for "Load All" feature
-    all_ninja_profits = ninja_profits
+    logger.debug('Total gems with complete data for profit calculation: %d', len(estimates))
     
-    # Sort by profit % and get top 5
-    estimated_profits.sort(key=lambda x: x['profit_percent'], reverse=True)
-    top_5 = estimated_profits[:5]
+    # Top 5 by estimated ROI%
+    top_5 = [
+        {'name': name, 'profit_percent': row.profit_percent, 'estimated_profit': row.profit}
+        for name, row in estimates.nlargest(5, 'profit_percent').iterrows()
+    ]
     
-    print(f"\nTop 5 gems by estimated ROI%:")
+    logger.info('Top 5 gems by estimated ROI%:')
     for i, gem in enumerate(top_5, 1):
-        print(f"  {i}. {gem['name']}: {gem['profit_percent']:.1f}% ({gem['estimated_profit']:.1f}c)")
-    
-    # Wait before starting trade site requests to avoid rate limiting
-    print("\nWaiting 5 seconds before fetching from trade site...")
-    time.sleep(5)
+        logger.info('  %d. %s: %.1f%% (%.1fc)', i, gem['name'], gem['profit_percent'], gem['estimated_profit'])
     
+    # No warm-up pause needed: phase 1 only hit poe.ninja, and the trade limiters
+    # pace phase 2 from the X-Rate-Limit-Ip headers
     # Phase 2: Get trade site prices for top 5 only
     loading_progress['phase'] = 'trade_top5'
     loading_progress['total'] = len(top_5)
     loading_progress['status'] = 'Fetching trade prices for top 5 gems...'
-    print("\nPhase 2: Fetching trade site prices for top 5 gems...")
-    
-    profits_data = []
-    for i, gem_estimate in enumerate(top_5, 1):
-        loading_progress['current'] = i
-        gem_name = gem_estimate['name']
-        loading_progress['status'] = f"Processing top gem {i}/5: {gem_name}"
-        print(f"\n=== Processing {i}/5: {gem_name} ===")
-        
-        profit = calculator.calculate_basic_profit(gem_name)
-        if profit:
-            print(f"✓ Successfully added {gem_name}")
-            profit['from_trade'] = True  # Mark as trade site data
-            profits_data.append(profit)
-        else:
-            print(f"✗ Failed to get prices for {gem_name}")
-        
-        print(f"Waiting 8 seconds before next gem...")
-        time.sleep(8)  # Rate limiting - 8 seconds to be safe
+    logger.info('Phase 2: Fetching trade site prices for top 5 gems...')
+    
+    new_profits = []
+    loading_progress['current'] = 0
+    # Gems are fetched concurrently; api.trade_slots and api.trade_limiters keep the
+    # combined request rate under GGG's limit, so no pause between gems is needed
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = {executor.submit(calculator.calculate_basic_profit, gem['name']): gem['name'] for gem in top_5}
+        for i, future in enumerate(as_completed(futures), 1):
+            gem_name = futures[future]
+            loading_progress['current'] = i
+            loading_progress['status'] = f"Fetched top gem {i}/{len(top_5)}: {gem_name}"
+            
+            try:
+                profit = future.result()
+            except Exception as e:
+                # One bad gem shouldn't sink the whole load
+                logger.warning('✗ Error getting prices for %s: %s', gem_name, e)
+                continue
+            if profit:
+                logger.debug('✓ Successfully added %s', gem_name)
+                profit['from_trade'] = True  # Mark as trade site data
+                new_profits.append(profit)
+            else:
+                logger.warning('✗ Failed to get prices for %s', gem_name)
     
-    print(f"\n=== Phase 2 Complete ===")
-    print(f"Successfully loaded {len(profits_data)} out of {len(top_5)} gems")
+    logger.info('Phase 2 complete: loaded %d out of %d gems', len(new_profits), len(top_5))
     
-    # Sort by actual ROI% from trade site
-    if profits_data:
-        profits_data.sort(key=lambda x: x['profit_percent'], reverse=True)
+    # Swap in the new snapshot (sorted by actual ROI% from trade site)
+    publish_profits(new_profits)
     
     loading_progress['complete'] = True
-    loading_progress['status'] = f"Complete! Loaded top {len(profits_data)} gems"
+    loading_progress['status'] = f"Complete! Loaded top {len(new_profits)} gems"
     
     # Set initial timestamp
     global last_refresh_time
     last_refresh_time = datetime.now().strftime('%H:%M:%S')
     
-    print(f"Final: Successfully loaded top {len(profits_data)} gems with trade site prices")
-    print(f"Initial timestamp set to: {last_refresh_time}")
+    logger.debug('Timestamp set to: %s', last_refresh_time)
 
-# Store ninja data and all gem names for "Load All" feature
-ninja_data = {}
-all_ninja_profits = {}
+# poe.ninja estimated profit rows indexed by gem name, for the "Load All" feature
+all_ninja_profits = pd.DataFrame()
 
-# Cache for corruption data to avoid re-fetching
+# Cache for corruption data to avoid re-fetching, keyed by (gem name, league, base cost).
+# Entries are (timestamp, data); the in-memory copy keeps card cache identity checks cheap and
+# the disk copy (tagged 'corruption_ev') lets repeat clicks survive restarts.
 corruption_cache = {}
+CORRUPTION_CACHE_TTL = 3600
+corruption_locks = defaultdict(threading.Lock)  # Gem name -> lock held while its corruption data is fetched
 current_analysis_gem = None  # Track which gem is currently displayed in footer
 
+# Rendered analysis cards as JSON-ready dicts, keyed by (gem name, league, currency mode, divine rate).
+# Each entry keeps the corruption data it was built from, so a refetch invalidates it.
+analysis_card_cache = {}
+
+def cached_corruption_ev(gem_name, gem_data):
+    """Corruption EV for a gem, served from memory or disk for repeat clicks within CORRUPTION_CACHE_TTL"""
+    key = ('corruption_ev', gem_name, calculator.api.league, round(gem_data['total_cost'], 2))
+    # Concurrent clicks on the same gem wait for the first fetch instead of repeating its trade calls
+    with corruption_locks[gem_name]:
+        cached = corruption_cache.get(key) or cache.get(key)
+        if cached and time.time() - cached[0] < CORRUPTION_CACHE_TTL:
+            logger.debug('Using cached corruption data for %s', gem_name)
+            corruption_cache[key] = cached
+            return cached[1]
+        
+        logger.debug('Fetching corruption data for %s', gem_name)
+        corruption_data = calculator.calculate_corruption_ev(gem_name, gem_data)
+        if corruption_data:
+            corruption_cache[key] = (time.time(), corruption_data)
+            cache.set(key, corruption_cache[key], expire=CORRUPTION_CACHE_TTL, tag='corruption_ev')
+        return corruption_data
+
+# Background trade price lookups for the best poe.ninja-only gems, started by "Load All"
+TRADE_PREFETCH_COUNT = 5
+TRADE_PREFETCH_TTL = 300  # Matches the trade price disk cache
+trade_prefetch_executor = ThreadPoolExecutor(max_workers=2)  # Leaves trade slots free for clicks
+trade_prefetches = {}  # gem name -> (submit time, Future of calculate_basic_profit)
+
+def prefetch_trade_prices(gem_names):
+    """Start trade site lookups for gems the user is likely to upgrade next"""
+    now = time.time()
+    # Expired prefetches would never be used - drop them so this Load All starts fresh lookups
+    for gem_name in [name for name, (started, _) in trade_prefetches.items() if now - started >= TRADE_PREFETCH_TTL]:
+        trade_prefetches.pop(gem_name, None)
+    for gem_name in gem_names:
+        if gem_name not in trade_prefetches:
+            trade_prefetches[gem_name] = (now, trade_prefetch_executor.submit(calculator.calculate_basic_profit, gem_name))
+
+def trade_profit_for(gem_name):
+    """Trade site profit for a gem, reusing a recent prefetch when there is one"""
+    prefetched = trade_prefetches.pop(gem_name, None)
+    if prefetched and time.time() - prefetched[0] < TRADE_PREFETCH_TTL:
+        try:
+            profit = prefetched[1].result()
+        except Exception as e:
+            logger.warning('Trade prefetch for %s failed, fetching again: %s', gem_name, e)
+            profit = None
+        if profit:
+            logger.debug('Using prefetched trade prices for %s', gem_name)
+            return profit
+    return calculator.calculate_basic_profit(gem_name)
+
 # Store last refresh timestamp
 last_refresh_time = None
 
 # Initialize profit data
 profits_data = []
+profits_by_name = {}  # name -> entry of profits_data, rebuilt on every publish
+profits_has_ninja = False  # Whether profits_data includes poe.ninja-priced gems, set on every publish
+
+# Bumped whenever profits_data changes so derived table data is only rebuilt when needed
+profits_version = 0
+
+# Writers hold this while replacing profits_data; readers always see a complete list
+profits_lock = threading.RLock()
+
+def mark_profits_changed():
+    """Invalidate derived table data after profits_data is modified"""
+    global profits_version
+    profits_version += 1
+
+def publish_profits(new_profits):
+    """Replace profits_data with a new ROI%-sorted list in one step"""
+    global profits_data, profits_by_name, profits_has_ninja
+    new_profits = sorted(new_profits, key=lambda x: x['profit_percent'], reverse=True)
+    by_name = {g['name']: g for g in new_profits}
+    has_ninja = not all(g.get('from_trade', True) for g in new_profits)
+    with profits_lock:
+        profits_data = new_profits
+        profits_by_name = by_name
+        profits_has_ninja = has_ninja
+        mark_profits_changed()
+
+# Single background worker that reloads prices whenever refresh_event is set
+refresh_event = threading.Event()
+refresh_thread = None
+_refresh_start_lock = threading.Lock()
+
+def _refresh_loop():
+    """Wait for refresh requests and reload gem prices; requests made mid-load are coalesced"""
+    while True:
+        refresh_event.wait()
+        refresh_event.clear()
+        loading_progress['load_id'] += 1
+        try:
+            load_gem_prices()
+        except Exception as e:
+            logger.exception('✗ Price refresh failed: %s', e)
+            loading_progress['complete'] = True
+            loading_progress['status'] = "Refresh failed - showing previous prices"
 
-# Only start loading thread if not running under gunicorn
+def request_refresh():
+    """Ask the background worker to reload prices, starting it on first use"""
+    global refresh_thread
+    with _refresh_start_lock:
+        if refresh_thread is None:
+            refresh_thread = threading.Thread(target=_refresh_loop, daemon=True)
+            refresh_thread.start()
+    refresh_event.set()
+
+# Only start loading if not running under gunicorn
 # Gunicorn sets SERVER_SOFTWARE env variable
 if not os.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
     print("Starting initial gem price loading...")
-    loading_thread = threading.Thread(target=load_gem_prices, daemon=True)
-    loading_thread.start()
+    request_refresh()
 else:
     print("Running under gunicorn - skipping initial load. Will load on first page visit.")
-    loading_thread = None
 
 # Initialize Dash app
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY])
@@ -569,59 +829,246 @@ currency_mode = 'chaos'  # Can be 'chaos' or 'divine'
 
 def format_price(chaos_value, mode='chaos'):
     """Format price based on display mode"""
+    # Many gems share the same round prices, so most calls are cache hits.
+    # Keyed on the raw value so the text always matches format_series for the table.
+    # The divine rate is part of the key, so a rate change never serves stale text.
+    return _format_price(float(chaos_value), mode, calculator.divine_rate)
+
+@functools.lru_cache(maxsize=4096)
+def _format_price(chaos_value, mode, divine_rate):
     if mode == 'divine':
-        divine_rate = calculator.divine_rate
         divine_value = chaos_value / divine_rate
         return f"{divine_value:.2f}d"
     else:
         return f"{chaos_value:.1f}c"
 
-def create_table_data(include_corruption=False):
-    """Create table data"""
-    table_data = []
+def format_series(chaos_values, mode='chaos'):
+    """Vectorized format_price for a whole column of chaos values"""
+    values = np.asarray(chaos_values, dtype=float)
+    if mode == 'divine':
+        return np.char.add(np.char.mod('%.2f', values / calculator.divine_rate).astype(str), 'd')
+    return np.char.add(np.char.mod('%.1f', values).astype(str), 'c')
+
+# Table column -> numeric profits_data field (all values in chaos)
+PRICE_COLUMNS = {
+    'L1': 'l1_cost',
+    'Level': 'leveling_cost',
+    'Quality': 'quality_cost',
+    'Total': 'total_cost',
+    'L5': 'l5_price',
+    'Profit': 'profit'
+}
+
+@functools.lru_cache(maxsize=1)
+def build_numeric_df(version):
+    """Unitless (chaos) table values for profits_data, rebuilt only when profits_version changes"""
+    df = pd.DataFrame(profits_data, columns=['name', *PRICE_COLUMNS.values(), 'profit_percent', 'from_trade'])
+    df['from_trade'] = df['from_trade'].fillna(True).astype(bool)
+    return df
+
+@functools.lru_cache(maxsize=4)
+def _build_table(version, mode, divine_rate):
+    """Formatted table rows, cached per data version and display currency"""
+    df = build_numeric_df(version)
+    
+    table = pd.DataFrame({
+        'gem_name': df['name'],  # Hidden but used for callbacks
+        'Gem': df['name'].str.replace('Awakened ', '', regex=False).str.replace(' Support', '', regex=False)
+    })
     
-    for gem in profits_data:
-        short_name = gem['name'].replace('Awakened ', '').replace(' Support', '')
-        
-        # Different button text based on data source
-        if gem.get('from_trade', True):
-            button_text = 'Gamba?'
-        else:
-            button_text = 'Trade Price'
-        
-        row = {
-            'gem_name': gem['name'],  # Hidden but used for callbacks
-            'Gem': short_name,
-            'L1': format_price(gem['l1_cost'], currency_mode),
-            'Level': format_price(gem['leveling_cost'], currency_mode),
-            'Quality': format_price(gem['quality_cost'], currency_mode),
-            'Total': format_price(gem['total_cost'], currency_mode),
-            'L5': format_price(gem['l5_price'], currency_mode),
-            'Profit': format_price(gem['profit'], currency_mode),
-            'ROI%': f"{gem['profit_percent']:.1f}%",
-            'Corrupt': button_text,
-            'from_ninja': 'true' if not gem.get('from_trade', True) else 'false'  # For styling
-        }
-        
-        table_data.append(row)
+    # Only the presentation step depends on the display currency
+    for column, field in PRICE_COLUMNS.items():
+        table[column] = format_series(df[field], mode)
+    table['ROI%'] = df['profit_percent'].astype(float)  # Numeric so native sorting orders by value
     
-    return table_data
+    # Different button text based on data source
+    table['Corrupt'] = df['from_trade'].map({True: 'Gamba?', False: 'Trade Price'})
+    table['from_ninja'] = df['from_trade'].map({True: 'false', False: 'true'})  # For styling
+    
+    return tuple(table.to_dict('records'))
+
+def create_table_data(include_corruption=False):
+    """Create table data"""
+    return list(_build_table(profits_version, currency_mode, calculator.divine_rate))
+
+# Column definitions don't depend on the data or display currency, so build them once
+TABLE_COLUMNS = [
+    {'name': 'Gem', 'id': 'Gem'},
+    {'name': 'L1', 'id': 'L1'},
+    {'name': 'Level Up', 'id': 'Level'},
+    {'name': 'Quality', 'id': 'Quality'},
+    {'name': 'Total', 'id': 'Total'},
+    {'name': 'L5', 'id': 'L5'},
+    {'name': 'Profit', 'id': 'Profit'},
+    {'name': 'ROI%', 'id': 'ROI%', 'type': 'numeric',
+     'format': Format(precision=1, scheme=Scheme.fixed).symbol(Symbol.yes).symbol_suffix('%')},
+    {'name': 'Corrupt', 'id': 'Corrupt'}
+]
 
 def create_columns(include_corruption=False):
     """Create column definitions"""
-    base_columns = [
-        {'name': 'Gem', 'id': 'Gem'},
-        {'name': 'L1', 'id': 'L1'},
-        {'name': 'Level Up', 'id': 'Level'},
-        {'name': 'Quality', 'id': 'Quality'},
-        {'name': 'Total', 'id': 'Total'},
-        {'name': 'L5', 'id': 'L5'},
-        {'name': 'Profit', 'id': 'Profit'},
-        {'name': 'ROI%', 'id': 'ROI%'},
-        {'name': 'Corrupt', 'id': 'Corrupt'}
-    ]
+    return TABLE_COLUMNS
+
+# Button icons and labels, built once and returned by reference
+LOAD_ALL_ICON_URL = "https://web.poecdn.com/gen/image/WzI1LDE0LHsiZiI6IjJESXRlbXMvR2Vtcy9TdXBwb3J0L1N1cHBvcnRQbHVzL011bHRpcGxlQXR0YWNrc1BsdXMiLCJ3IjoxLCJoIjoxLCJzY2FsZSI6MX1d/c32ddc2121/MultipleAttacksPlus.png"
+DIVINE_ICON_URL = "https://web.poecdn.com/gen/image/WzI1LDE0LHsiZiI6IjJESXRlbXMvQ3VycmVuY3kvQ3VycmVuY3lNb2RWYWx1ZXMiLCJzY2FsZSI6MX1d/ec48896769/CurrencyModValues.png"
+CHAOS_ICON_URL = "https://web.poecdn.com/gen/image/WzI1LDE0LHsiZiI6IjJESXRlbXMvQ3VycmVuY3kvQ3VycmVuY3lSZXJvbGxSYXJlIiwic2NhbGUiOjF9XQ/46a2347805/CurrencyRerollRare.png"
+LOAD_ALL_ICON = html.Img(src=LOAD_ALL_ICON_URL, height="20px", className="me-1")
+LOAD_ALL_CHILDREN = [LOAD_ALL_ICON, "Load All Gems"]
+HIDE_EXTRA_CHILDREN = [LOAD_ALL_ICON, "Hide Extra Gems"]
+
+# Static table styles, shared by reference rather than rebuilt
+TABLE_STYLE = {'overflowX': 'auto', 'overflowY': 'auto', 'maxHeight': '70vh'}  # Capped height so virtualization only renders rows in view, without padding short tables
+TABLE_STYLE_CELL = {
+    'backgroundColor': '#2b3e50',
+    'color': 'white',
+    'textAlign': 'center',  # Center all columns
+    'padding': '10px 10px 10px 25px',  # Increased left padding from 20 to 25
+    'fontFamily': 'monospace',
+    'height': '32px',  # Uniform row height for virtualized scrolling
+    'minWidth': '90px'
+}
+TABLE_STYLE_HEADER = {
+    'backgroundColor': '#1a252f',
+    'fontWeight': 'bold',
+    'textAlign': 'center',  # Center all headers
+    'padding': '10px 10px 10px 25px'  # Match cell padding for alignment
+}
+TABLE_STYLE_HEADER_CONDITIONAL = [{'if': {'column_id': 'Corrupt'}, 'textAlign': 'center'}]
+TABLE_CSS = [{
+    'selector': '.dash-spreadsheet td.focused',
+    'rule': 'background-color: #dc3545 !important;'  # Keep red when active
+}, {
+    'selector': '.dash-spreadsheet td.focused:hover',
+    'rule': 'background-color: #dc3545 !important;'  # Stay red on hover, don't turn white
+}]
+TABLE_STYLE_DATA_CONDITIONAL = [
+    {
+        'if': {'column_id': 'Gem'},
+        'cursor': 'pointer',
+        'color': 'white'
+    },
+    {
+        'if': {'column_id': 'Corrupt'},
+        'cursor': 'pointer',
+        'textAlign': 'center',
+        'backgroundColor': '#0d6776',  # Darker cyan/teal for Gamba
+        'color': 'white',
+        'fontWeight': 'bold',
+        'borderRadius': '4px'
+    },
+    {
+        'if': {
+            'filter_query': '{Corrupt} = "Trade Price"',
+            'column_id': 'Corrupt'
+        },
+        'backgroundColor': '#d97706',  # Amber/orange for Trade Price
+        'cursor': 'pointer',
+        'textAlign': 'center',
+        'color': 'white',
+        'fontWeight': 'bold',
+        'borderRadius': '4px'
+    },
+    # Profit colour comes from the numeric ROI% column, evaluated in the browser
+    {
+        'if': {
+            'filter_query': '{ROI%} < 0',
+            'column_id': 'Profit'
+        },
+        'color': '#ff6b6b'
+    },
+    {
+        'if': {
+            'filter_query': '{ROI%} > 0',
+            'column_id': 'Profit'
+        },
+        'color': '#51cf66'
+    },
+    # Different background for poe.ninja gems
+    {
+        'if': {
+            'filter_query': '{from_ninja} = "true"'
+        },
+        'backgroundColor': '#1e2a35'  # Darker background for ninja gems
+    }
+]
+
+# Analysis card styles, reused on every Gamba click
+OUTCOME_STYLE = {'fontSize': '0.9em'}
+EV_GAIN_STYLE = {'fontSize': '0.9em', 'color': '#00ff00'}
+EV_LOSS_STYLE = {'fontSize': '0.9em', 'color': '#ff0000'}
+
+# Corruption outcome line, rendered as one Markdown component instead of ~15 spans
+OUTCOMES_MARKDOWN = (
+    "• No Effect (33%): **{l5_no_change}**&nbsp;&nbsp; "
+    "• +1 Lvl (17%): **{l6}**&nbsp;&nbsp; "
+    "• -1 Lvl (17%): **{l4}**&nbsp;&nbsp; "
+    "• Q+ (17%): **{quality_up}**&nbsp;&nbsp; "
+    "• Q- (17%): **{quality_down}**"
+)
+
+# Trade search links under the analysis, one Markdown block instead of eight components
+TRADE_LINKS_MARKDOWN = (
+    "Uncorrupted: [🔍 L1 Q0]({l1q0})&nbsp; [🔍 L5 Q20]({l5q20})&nbsp;&nbsp; | &nbsp;"
+    "Corrupted: [🔍 L5 Q20]({l5q20_corrupted})&nbsp; [🔍 L6 Q20]({l6q20_corrupted})"
+)
+TRADE_LINKS_STYLE = {'fontSize': '0.85em'}
+
+# Static pieces of the analysis card, shared by every card instead of rebuilt per click
+CARD_EV_HEADING = html.H6("🔮 Corruption EV", className="mb-2")
+CARD_DIVIDER_SMALL = html.Hr(className="my-2")
+CARD_DIVIDER = html.Hr()
+CARD_EV_LABEL = {True: html.B("EV: ", style=EV_GAIN_STYLE), False: html.B("EV: ", style=EV_LOSS_STYLE)}
+COMPARISON_GAIN_STYLE = {'fontSize': '0.85em', 'color': '#00ff00'}
+COMPARISON_LOSS_STYLE = {'fontSize': '0.85em', 'color': '#ff0000'}
+
+# Click result alerts
+UPGRADE_SUCCESS_TEXT = "✓ Updated {gem} with trade site prices! Button now shows 'Gamba?' for corruption analysis."
+UPGRADE_FAILED_TEXT = "✗ Could not fetch trade site prices for {gem}. Try again in a moment."
+CORRUPTION_FAILED_ALERT = dbc.Alert("Could not fetch corruption prices from trade site. Try again in a moment.", color="warning")
+
+@functools.lru_cache(maxsize=256)
+def upgrade_alert(gem_name, success):
+    """Dismissable Trade Price upgrade alert, serialized once per gem and outcome"""
+    text = (UPGRADE_SUCCESS_TEXT if success else UPGRADE_FAILED_TEXT).format(gem=gem_name)
+    alert = dbc.Alert(text, color="success" if success else "danger", dismissable=True, duration=4000)
+    return orjson.loads(to_json_plotly(alert))
+
+def build_analysis_card(gem_name, corruption_data, league, mode):
+    """Corruption analysis card for a gem; only the prices, gem name and links vary between cards"""
+    comparison = corruption_data['ev_profit'] - corruption_data['base_profit']
+    comparison_text = f"+{comparison:.1f}c" if comparison > 0 else f"{comparison:.1f}c"
+    ev_gain = corruption_data['ev_profit'] > 0
     
-    return base_columns
+    return dbc.Card([
+        dbc.CardHeader(html.H6(f"🎰 Corruption Analysis: {gem_name}", className="mb-0")),
+        dbc.CardBody([
+            CARD_EV_HEADING,
+            dcc.Markdown(
+                OUTCOMES_MARKDOWN.format(**{k: format_price(v, mode) for k, v in corruption_data['outcomes'].items()}),
+                className="mb-2", style=OUTCOME_STYLE
+            ),
+            CARD_DIVIDER_SMALL,
+            html.Div([
+                CARD_EV_LABEL[ev_gain],
+                html.B(f"{format_price(corruption_data['ev_profit'], mode)} ({corruption_data['ev_percent']:.1f}%)",
+                       style=EV_GAIN_STYLE if ev_gain else EV_LOSS_STYLE),
+                html.Br(),
+                html.Small(f"vs Base: {comparison_text}",
+                           style=COMPARISON_GAIN_STYLE if comparison > 0 else COMPARISON_LOSS_STYLE)
+            ]),
+            CARD_DIVIDER,
+            dcc.Markdown(
+                TRADE_LINKS_MARKDOWN.format(
+                    l1q0=trade_search_url(TRADE_URL_L1Q0, league, gem_name),
+                    l5q20=trade_search_url(TRADE_URL_L5Q20, league, gem_name),
+                    l5q20_corrupted=trade_search_url(TRADE_URL_L5Q20_CORRUPTED, league, gem_name),
+                    l6q20_corrupted=trade_search_url(TRADE_URL_L6Q20_CORRUPTED, league, gem_name)
+                ),
+                link_target="_blank", className="mt-2 text-muted", style=TRADE_LINKS_STYLE
+            )
+        ])
+    ], color="dark", outline=True)
 
 # Layout
 app.layout = dbc.Container([
@@ -631,6 +1078,22 @@ app.layout = dbc.Container([
     # Auto-refresh interval component (default 20 minutes = 1,200,000 ms)
     dcc.Interval(id='auto-refresh-interval', interval=1200000, n_intervals=0, disabled=False),
     
+    # L1 Q0 trade URL with only {gem} left to fill in the browser, plus an output slot for the Gem click handler
+    dcc.Store(id='trade-url-l1q0', data=TRADE_URL_L1Q0.replace('{league}', quote(calculator.api.league, safe=''))),
+    dcc.Store(id='trade-link-opened'),
+    
+    # (currency mode, profits version) last sent to this browser's table
+    dcc.Store(id='table-key'),
+    
+    # loading_progress snapshot last sent to this browser's progress modal
+    dcc.Store(id='progress-snapshot'),
+    
+    # Output slot for the footer toggles, which only change CSS classes in the browser
+    dcc.Store(id='footer-dummy'),
+    
+    # Whether gem-analysis currently holds a message or card, so the footer can open without reading it
+    dcc.Store(id='analysis-present', data=False),
+    
     # Loading overlay
     dbc.Modal([
         dbc.ModalHeader("Loading Gem Prices"),
@@ -740,15 +1203,11 @@ app.layout = dbc.Container([
                     dbc.Row([
                         dbc.Col([
                             dbc.Button("🔄 Refresh Prices", id="refresh-button", color="primary", size="sm", className="me-2"),
-                            dbc.Button([
-                                html.Img(src="https://web.poecdn.com/gen/image/WzI1LDE0LHsiZiI6IjJESXRlbXMvR2Vtcy9TdXBwb3J0L1N1cHBvcnRQbHVzL011bHRpcGxlQXR0YWNrc1BsdXMiLCJ3IjoxLCJoIjoxLCJzY2FsZSI6MX1d/c32ddc2121/MultipleAttacksPlus.png",
-                                        height="20px", className="me-1"),
-                                "Load All Gems"
-                            ], id="load-all-button", color="success", size="sm", className="me-2", 
+                            dbc.Button(LOAD_ALL_CHILDREN, id="load-all-button", color="success", size="sm", className="me-2", 
                             style={'backgroundColor': '#1e7e34', 'borderColor': '#1c7430', 'transition': 'all 0.15s ease-in-out'}),
                             dbc.Button([
                                 html.Img(id="currency-icon",
-                                        src="https://web.poecdn.com/gen/image/WzI1LDE0LHsiZiI6IjJESXRlbXMvQ3VycmVuY3kvQ3VycmVuY3lNb2RWYWx1ZXMiLCJzY2FsZSI6MX1d/ec48896769/CurrencyModValues.png",
+                                        src=DIVINE_ICON_URL,
                                         height="20px", className="me-1"),
                                 html.Span("Show Divine", id="currency-text")
                             ], id="currency-toggle", size="sm", className="me-2",
@@ -807,102 +1266,23 @@ app.layout = dbc.Container([
                 id='gem-table',
                 columns=create_columns(False),
                 data=create_table_data(False),
-                style_table={'overflowX': 'auto'},
-                style_cell={
-                    'backgroundColor': '#2b3e50',
-                    'color': 'white',
-                    'textAlign': 'center',  # Center all columns
-                    'padding': '10px 10px 10px 25px',  # Increased left padding from 20 to 25
-                    'fontFamily': 'monospace'
-                },
-                style_header={
-                    'backgroundColor': '#1a252f',
-                    'fontWeight': 'bold',
-                    'textAlign': 'center',  # Center all headers
-                    'padding': '10px 10px 10px 25px'  # Match cell padding for alignment
-                },
-                style_header_conditional=[
-                    {
-                        'if': {'column_id': 'Corrupt'},
-                        'textAlign': 'center'
-                    }
-                ],
-                css=[{
-                    'selector': '.dash-spreadsheet td.focused',
-                    'rule': 'background-color: #dc3545 !important;'  # Keep red when active
-                }, {
-                    'selector': '.dash-spreadsheet td.focused:hover',
-                    'rule': 'background-color: #dc3545 !important;'  # Stay red on hover, don't turn white
-                }, {
-                    'selector': '.previous-next-container',
-                    'rule': 'background-color: #2b3e50 !important; border-radius: 4px; padding: 5px;'
-                }, {
-                    'selector': '.previous-next-container button',
-                    'rule': 'background-color: #1a252f !important; color: white !important; border: 1px solid #375a7f !important; border-radius: 4px; padding: 5px 10px; margin: 0 3px;'
-                }, {
-                    'selector': '.previous-next-container button:hover',
-                    'rule': 'background-color: #375a7f !important; cursor: pointer;'
-                }, {
-                    'selector': '.previous-next-container button:disabled',
-                    'rule': 'background-color: #1a252f !important; color: #6c757d !important; opacity: 0.5; cursor: not-allowed;'
-                }],
-                style_data_conditional=[
-                    {
-                        'if': {'column_id': 'Gem'},
-                        'cursor': 'pointer',
-                        'color': 'white'
-                    },
-                    {
-                        'if': {'column_id': 'Corrupt'},
-                        'cursor': 'pointer',
-                        'textAlign': 'center',
-                        'backgroundColor': '#0d6776',  # Darker cyan/teal for Gamba
-                        'color': 'white',
-                        'fontWeight': 'bold',
-                        'borderRadius': '4px'
-                    },
-                    {
-                        'if': {
-                            'filter_query': '{Corrupt} = "Trade Price"',
-                            'column_id': 'Corrupt'
-                        },
-                        'backgroundColor': '#d97706',  # Amber/orange for Trade Price
-                        'cursor': 'pointer',
-                        'textAlign': 'center',
-                        'color': 'white',
-                        'fontWeight': 'bold',
-                        'borderRadius': '4px'
-                    },
-                    {
-                        'if': {
-                            'filter_query': '{Profit} contains "-"',
-                            'column_id': 'Profit'
-                        },
-                        'color': '#ff6b6b'
-                    },
-                    {
-                        'if': {
-                            'filter_query': '{Profit} contains "+"',
-                            'column_id': 'Profit'
-                        },
-                        'color': '#51cf66'
-                    },
-                    # Different background for poe.ninja gems
-                    {
-                        'if': {
-                            'filter_query': '{from_ninja} = "true"'
-                        },
-                        'backgroundColor': '#1e2a35'  # Darker background for ninja gems
-                    }
-                ],
-                page_size=20,
+                style_table=TABLE_STYLE,
+                style_cell=TABLE_STYLE_CELL,
+                style_header=TABLE_STYLE_HEADER,
+                style_header_conditional=TABLE_STYLE_HEADER_CONDITIONAL,
+                css=TABLE_CSS,
+                style_data_conditional=TABLE_STYLE_DATA_CONDITIONAL,
+                # All rows in one scrolling view, only the visible ones in the DOM
+                virtualization=True,
+                fixed_rows={'headers': True},
+                page_action='none',
                 sort_action='native'
             )
         ])
     ]),
     
-    # Spacer to push content up when footer is visible
-    html.Div(id='footer-spacer', style={'height': '0px', 'transition': 'height 0.3s ease-in-out'}),
+    # Spacer to push content up when footer is visible (height set by assets/style.css)
+    html.Div(id='footer-spacer'),
     
     # Analysis section (sticky footer for Gamba results)
     dbc.Row([
@@ -917,14 +1297,12 @@ app.layout = dbc.Container([
                               'color': 'white',
                               'textDecoration': 'none',
                               'fontSize': '24px',
-                              'zIndex': '1001',
-                              'display': 'none'  # Hidden by default
+                              'zIndex': '1001'  # Shown only while the footer is open (assets/style.css)
                           }),
                 # Analysis content
                 html.Div(id='gem-analysis', className="mt-3")
             ], style={
-                'position': 'fixed',
-                'bottom': '-50vh',  # Start hidden below screen
+                'position': 'fixed',  # Slide position and transition come from assets/style.css
                 'left': '0',
                 'right': '0',
                 'zIndex': '1000',
@@ -933,8 +1311,7 @@ app.layout = dbc.Container([
                 'paddingRight': '60px',  # Extra space on right so close button isn't over gray
                 'boxShadow': '0 -2px 10px rgba(0,0,0,0.3)',
                 'maxHeight': '35vh',
-                'overflowY': 'auto',
-                'transition': 'bottom 0.3s ease-in-out'  # Smooth animation
+                'overflowY': 'auto'
             }, id='gem-analysis-footer')
         ])
     ]),
@@ -947,8 +1324,7 @@ app.layout = dbc.Container([
         'bottom': '20px',
         'left': '50%',
         'transform': 'translateX(-50%)',
-        'zIndex': '999',
-        'display': 'none'
+        'zIndex': '999'  # Shown once the footer is dismissed (assets/style.css)
     })
     
 ], fluid=True, className="p-4", id='main-content', style={
@@ -963,25 +1339,30 @@ app.layout = dbc.Container([
     Output('loading-status', 'children'),
     Output('loading-modal', 'is_open'),
     Output('progress-interval', 'disabled'),
-    Input('progress-interval', 'n_intervals')
+    Output('progress-snapshot', 'data'),
+    Input('progress-interval', 'n_intervals'),
+    State('progress-snapshot', 'data')
 )
-def update_progress(n):
+def update_progress(n, last_snapshot):
     """Update loading progress bar"""
-    global loading_thread
-    
     # Start loading on first interval if running under gunicorn and not started yet
-    if n == 1 and loading_thread is None:
-        print("🚀 Progress interval triggered - starting gem price loading...")
-        loading_thread = threading.Thread(target=load_gem_prices, daemon=True)
-        loading_thread.start()
+    if n == 1 and refresh_thread is None:
+        logger.info('🚀 Progress interval triggered - starting gem price loading...')
+        request_refresh()
     
     # Safety: disable after 5 minutes (600 intervals at 500ms each)
     if n > 600:
-        print("⚠️ Progress interval timeout - disabling after 5 minutes")
-        return 100, "100%", "Timeout", False, True
+        logger.warning('⚠️ Progress interval timeout - disabling after 5 minutes')
+        return 100, "100%", "Timeout", False, True, None
+    
+    # Most ticks land between progress updates - skip the response when this browser is already current
+    snapshot = [loading_progress['load_id'], loading_progress['current'], loading_progress['total'],
+                loading_progress['status'], loading_progress['complete']]
+    if snapshot == last_snapshot:
+        raise PreventUpdate
     
     if loading_progress['total'] == 0:
-        return 0, "0%", "Initializing...", True, False
+        return 0, "0%", "Initializing...", True, False, snapshot
     
     percent = (loading_progress['current'] / loading_progress['total']) * 100
     label = f"{loading_progress['current']}/{loading_progress['total']} ({percent:.0f}%)"
@@ -995,7 +1376,7 @@ def update_progress(n):
     is_open = not loading_progress['complete']
     interval_disabled = loading_progress['complete']  # Disable when complete
     
-    return percent, label, status, is_open, interval_disabled
+    return percent, label, status, is_open, interval_disabled, snapshot
 
 
 @app.callback(
@@ -1009,67 +1390,32 @@ def update_progress(n):
 )
 def load_all_gems(n_clicks):
     """Toggle between showing all gems (with poe.ninja) and only trade site gems"""
-    global profits_data
-    
     if not n_clicks or not loading_progress['complete']:
-        return [
-            html.Img(src="https://web.poecdn.com/gen/image/WzI1LDE0LHsiZiI6IjJESXRlbXMvR2Vtcy9TdXBwb3J0L1N1cHBvcnRQbHVzL011bHRpcGxlQXR0YWNrc1BsdXMiLCJ3IjoxLCJoIjoxLCJzY2FsZSI6MX1d/c32ddc2121/MultipleAttacksPlus.png",
-                    height="20px", className="me-1"),
-            "Load All Gems"
-        ], False, f"Top {len(profits_data)} gems", dash.no_update, dash.no_update
-    
-    # Check if we currently have poe.ninja gems loaded
-    has_ninja_gems = any(not g.get('from_trade', True) for g in profits_data)
-    
-    if has_ninja_gems:
-        # Hide poe.ninja gems - keep only trade site gems
-        profits_data = [g for g in profits_data if g.get('from_trade', True)]
-        profits_data.sort(key=lambda x: x['profit_percent'], reverse=True)
-        print(f"Hiding poe.ninja gems, showing only {len(profits_data)} trade site gems")
-        return [
-            html.Img(src="https://web.poecdn.com/gen/image/WzI1LDE0LHsiZiI6IjJESXRlbXMvR2Vtcy9TdXBwb3J0L1N1cHBvcnRQbHVzL011bHRpcGxlQXR0YWNrc1BsdXMiLCJ3IjoxLCJoIjoxLCJzY2FsZSI6MX1d/c32ddc2121/MultipleAttacksPlus.png",
-                    height="20px", className="me-1"),
-            "Load All Gems"
-        ], False, f"Top {len(profits_data)} gems", create_table_data(False), create_columns(False)
-    else:
-        # Show all gems - add poe.ninja gems
-        loaded_gems = {gem['name'] for gem in profits_data}
-        added_count = 0
+        return LOAD_ALL_CHILDREN, False, f"Top {len(profits_data)} gems", dash.no_update, dash.no_update
+    
+    # Hold the lock for the read-modify-write so a concurrent upgrade isn't lost
+    with profits_lock:
+        # Check if we currently have poe.ninja gems loaded
+        if profits_has_ninja:
+            # Hide poe.ninja gems - keep only trade site gems
+            publish_profits([g for g in profits_data if g.get('from_trade', True)])
+            logger.debug('Hiding poe.ninja gems, showing only %d trade site gems', len(profits_data))
+            return LOAD_ALL_CHILDREN, False, f"Top {len(profits_data)} gems", create_table_data(False), create_columns(False)
+        else:
+            # Show all gems - add poe.ninja gems
+            # Every poe.ninja estimate not already shown with trade prices, marked as poe.ninja data
+            extra = all_ninja_profits.drop(list(profits_by_name), errors='ignore')
+            ninja_gems = extra.rename_axis('name').reset_index().assign(from_trade=False).to_dict('records')
         
-        for name, data in all_ninja_profits.items():
-            if name not in loaded_gems and 'l1' in data and 'l5' in data:
-                l1_cost = data['l1']
-                l5_price = data['l5']
-                leveling_cost = 4 * calculator.currency_prices.get('brambleback', 10)
-                quality_cost = 20 * calculator.currency_prices.get('gcp', 1)
-                total_cost = l1_cost + leveling_cost + quality_cost
-                profit = l5_price - total_cost
-                profit_percent = (profit / total_cost * 100) if total_cost > 0 else 0
-                
-                profits_data.append({
-                    'name': data['name'],
-                    'l1_cost': l1_cost,
-                    'leveling_cost': leveling_cost,
-                    'quality_cost': quality_cost,
-                    'total_cost': total_cost,
-                    'l5_price': l5_price,
-                    'profit': profit,
-                    'profit_percent': profit_percent,
-                    'from_trade': False  # Mark as poe.ninja data
-                })
-                added_count += 1
+            # Warm up trade prices for the most promising "Trade Price" buttons
+            prefetch_trade_prices(extra.nlargest(TRADE_PREFETCH_COUNT, 'profit_percent').index)
         
-        # Re-sort by ROI%
-        profits_data.sort(key=lambda x: x['profit_percent'], reverse=True)
+            # Re-sorted by ROI% on publish
+            publish_profits(profits_data + ninja_gems)
         
-        print(f"Added {added_count} gems from poe.ninja data")
-        print(f"Total gems now: {len(profits_data)}")
+            logger.debug('Added %d gems from poe.ninja data, %d total', len(ninja_gems), len(profits_data))
         
-        return [
-            html.Img(src="https://web.poecdn.com/gen/image/WzI1LDE0LHsiZiI6IjJESXRlbXMvR2Vtcy9TdXBwb3J0L1N1cHBvcnRQbHVzL011bHRpcGxlQXR0YWNrc1BsdXMiLCJ3IjoxLCJoIjoxLCJzY2FsZSI6MX1d/c32ddc2121/MultipleAttacksPlus.png",
-                    height="20px", className="me-1"),
-            "Hide Extra Gems"
-        ], False, f"All {len(profits_data)} gems", create_table_data(False), create_columns(False)
+            return HIDE_EXTRA_CHILDREN, False, f"All {len(profits_data)} gems", create_table_data(False), create_columns(False)
 
 
 
@@ -1087,11 +1433,11 @@ def toggle_currency_mode(n_clicks):
     if currency_mode == 'chaos':
         currency_mode = 'divine'
         # Showing divine mode, so button should show chaos icon with "Show Chaos" text
-        return "https://web.poecdn.com/gen/image/WzI1LDE0LHsiZiI6IjJESXRlbXMvQ3VycmVuY3kvQ3VycmVuY3lSZXJvbGxSYXJlIiwic2NhbGUiOjF9XQ/46a2347805/CurrencyRerollRare.png", "Show Chaos"
+        return CHAOS_ICON_URL, "Show Chaos"
     else:
         currency_mode = 'chaos'
         # Showing chaos mode, so button should show divine icon with "Show Divine" text
-        return "https://web.poecdn.com/gen/image/WzI1LDE0LHsiZiI6IjJESXRlbXMvQ3VycmVuY3kvQ3VycmVuY3lNb2RWYWx1ZXMiLCJzY2FsZSI6MX1d/ec48896769/CurrencyModValues.png", "Show Divine"
+        return DIVINE_ICON_URL, "Show Divine"
 
 
 @app.callback(
@@ -1119,47 +1465,56 @@ def update_auto_refresh_settings(toggle_value, interval_minutes):
     Output('last-update', 'children'),
     Output('gems-shown-status', 'children', allow_duplicate=True),
     Output('progress-interval', 'disabled', allow_duplicate=True),
+    Output('table-key', 'data'),
     Input('refresh-button', 'n_clicks'),
     Input('auto-refresh-interval', 'n_intervals'),
     Input('progress-interval', 'n_intervals'),
     Input('currency-toggle', 'n_clicks'),  # Add currency toggle as trigger
+    State('table-key', 'data'),
     prevent_initial_call=True
 )
-def update_table_and_analysis(n_clicks, auto_refresh_intervals, progress_intervals, currency_clicks):
+def update_table_and_analysis(n_clicks, auto_refresh_intervals, progress_intervals, currency_clicks, table_key):
     """Update table based on refresh triggers"""
     global corruption_cache, last_refresh_time
     
     # Get which input triggered the callback
-    ctx = callback_context
-    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+    triggered_id = callback_context.triggered_id
     
     # Clear corruption cache and reload data when refresh button clicked or auto-refresh triggers
     if triggered_id == 'refresh-button' or triggered_id == 'auto-refresh-interval':
+        # A reload is already running - don't reset its progress or stack another one behind it
+        if refresh_thread is not None and not loading_progress['complete']:
+            logger.debug('Refresh already in progress - ignoring %s', triggered_id)
+            raise PreventUpdate
         source = "Auto-refresh" if triggered_id == 'auto-refresh-interval' else "Manual refresh"
-        print(f"🔄 {source} triggered - reloading gem prices...")
+        logger.info('🔄 %s triggered - reloading gem prices...', source)
         corruption_cache = {}
-        profits_data.clear()  # Clear existing data
+        cache.evict('corruption_ev')
+        trade_prefetches.clear()
+        # A refresh always means fresh prices - the interval can be shorter than the price cache TTLs
+        calculator.api.clear_price_caches()
+        analysis_card_cache.clear()
+        # The current snapshot stays in place until the worker publishes new prices
         # Fully reset the loading progress
         loading_progress['complete'] = False
         loading_progress['current'] = 0
         loading_progress['total'] = 0
         loading_progress['status'] = 'Starting refresh...'
         loading_progress['phase'] = 'ninja'
-        print(f"Reset loading_progress: {loading_progress}")
-        # Start a new loading thread
-        loading_thread = threading.Thread(target=load_gem_prices, daemon=True)
-        loading_thread.start()
-        print("Started new loading thread")
-        return [], create_columns(False), "Last updated: Refreshing...", "Refreshing...", False  # Re-enable progress interval
+        logger.debug('Reset loading_progress: %s', loading_progress)
+        # Wake the background worker (repeat clicks while loading are coalesced)
+        request_refresh()
+        logger.debug('Requested background refresh')
+        return [], create_columns(False), "Last updated: Refreshing...", "Refreshing...", False, None  # Re-enable progress interval
     
     # Wait until data is loaded
     if not loading_progress['complete'] or not profits_data:
-        return [], create_columns(False), "Last updated: Loading...", "Loading...", dash.no_update
+        return [], create_columns(False), "Last updated: Loading...", "Loading...", dash.no_update, None
     
     # Only update timestamp on actual data refresh (not currency toggle or progress interval after loading)
     if triggered_id not in ['currency-toggle', 'progress-interval']:
         last_refresh_time = datetime.now().strftime('%H:%M:%S')
-        print(f"Updated timestamp to: {last_refresh_time} (triggered by {triggered_id})")
+        logger.debug('Updated timestamp to: %s (triggered by %s)', last_refresh_time, triggered_id)
     
     # Use the stored timestamp
     timestamp = f"Last updated: {last_refresh_time}" if last_refresh_time else "Last updated: Never"
@@ -1167,263 +1522,159 @@ def update_table_and_analysis(n_clicks, auto_refresh_intervals, progress_interva
     # Update status
     gems_status = f"Top {len(profits_data)} gems" if len(profits_data) <= 5 else f"All {len(profits_data)} gems"
     
-    return create_table_data(False), create_columns(False), timestamp, gems_status, dash.no_update
+    # Skip the response entirely when this browser already shows the same prices in the same currency;
+    # the timestamp and status were sent along with that data
+    new_key = [currency_mode, profits_version]
+    if new_key == table_key:
+        raise PreventUpdate
+    
+    # A currency-only change keeps the same rows, and the column definitions don't depend on currency
+    columns = dash.no_update if table_key and table_key[1] == profits_version else create_columns(False)
+    
+    return create_table_data(False), columns, timestamp, gems_status, dash.no_update, new_key
 
 
 @app.callback(
     Output('gem-analysis', 'children'),
     Output('gem-table', 'data', allow_duplicate=True),
+    Output('analysis-present', 'data'),
     Input('gem-table', 'active_cell'),
     Input('currency-toggle', 'n_clicks'),
-    State('gem-table', 'data'),
+    State('gem-table', 'derived_viewport_data'),
     prevent_initial_call=True
 )
-def display_gem_details(active_cell, currency_clicks, table_data):
+def display_gem_details(active_cell, currency_clicks, viewport_data):
     """Handle cell clicks - Gem opens trade link, Trade Price upgrades data, Gamba shows analysis"""
     global corruption_cache, profits_data, current_analysis_gem
     
     ctx = callback_context
     if not ctx.triggered:
-        return html.Div(), dash.no_update
+        return html.Div(), dash.no_update, False
     
-    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0]
+    triggered_id = ctx.triggered_id
     
     # If currency toggle triggered, regenerate analysis for current gem
     if triggered_id == 'currency-toggle':
+        # Nothing on screen to redraw - skip the response entirely
         if not current_analysis_gem:
-            return dash.no_update, dash.no_update
+            raise PreventUpdate
         # Use the stored gem name to regenerate analysis
         gem_name = current_analysis_gem
         # Find the gem data
-        gem_data = next((g for g in profits_data if g['name'] == gem_name), None)
+        gem_data = profits_by_name.get(gem_name)
         if not gem_data or not gem_data.get('from_trade', True):
-            return dash.no_update, dash.no_update
+            return dash.no_update, dash.no_update, dash.no_update
         # Skip to the corruption analysis section below
     else:
         # Normal cell click handling
         if not active_cell:
-            return html.Div(), dash.no_update
+            return html.Div(), dash.no_update, False
         
-        clicked_row = table_data[active_cell['row']]
+        # active_cell['row'] indexes the rows as displayed (sorted/paged), not the raw data
+        clicked_row = viewport_data[active_cell['row']]
         gem_name = clicked_row['gem_name']
         
-        # Handle Gem column - open trade link using HTML/JS
+        # Gem column trade links are opened in the browser by the clientside callback below
         if active_cell['column_id'] == 'Gem':
-            trade_url = f"https://www.pathofexile.com/trade/search/{calculator.api.league}?q={{%22query%22:{{%22status%22:{{%22option%22:%22available%22}},%22type%22:%22{gem_name}%22,%22filters%22:{{%22misc_filters%22:{{%22filters%22:{{%22gem_level%22:{{%22min%22:1,%22max%22:1}},%22quality%22:{{%22min%22:0,%22max%22:0}},%22corrupted%22:{{%22option%22:%22false%22}}}}}}}}}}}}"
-            return html.Div([
-                dcc.Location(id='dummy-location', refresh=False),
-                html.Iframe(
-                    srcDoc=f'<script>window.open("{trade_url}", "_blank"); window.parent.postMessage("close", "*");</script>',
-                    style={'display': 'none'}
-                )
-            ]), dash.no_update
+            raise PreventUpdate
         
         # Handle Corrupt column
         if active_cell['column_id'] != 'Corrupt':
-            return html.Div(), dash.no_update
+            return html.Div(), dash.no_update, False
         
         # Find profit data for this gem
-        gem_data = next((g for g in profits_data if g['name'] == gem_name), None)
+        gem_data = profits_by_name.get(gem_name)
         if not gem_data:
-            return html.Div("Gem not found", className="text-danger"), dash.no_update
+            return html.Div("Gem not found", className="text-danger"), dash.no_update, True
         
         # Check if this is a "Trade Price" button (poe.ninja gem)
         if not gem_data.get('from_trade', True):
             # Fetch trade site prices and upgrade the gem data
-            print(f"Upgrading {gem_name} from poe.ninja to trade site prices...")
+            logger.info('Upgrading %s from poe.ninja to trade site prices...', gem_name)
             
             # Fetch trade prices
-            trade_profit = calculator.calculate_basic_profit(gem_name)
+            trade_profit = trade_profit_for(gem_name)
             
             if trade_profit:
-                # Update the gem in profits_data
-                for i, gem in enumerate(profits_data):
-                    if gem['name'] == gem_name:
-                        trade_profit['from_trade'] = True
-                        profits_data[i] = trade_profit
-                        print(f"✓ Upgraded {gem_name} to trade site data")
-                        break
-                
-                # Re-sort by ROI%
-                profits_data.sort(key=lambda x: x['profit_percent'], reverse=True)
+                # Swap the gem's entry for the trade site data (re-sorted by ROI% on publish)
+                trade_profit['from_trade'] = True
+                with profits_lock:
+                    publish_profits([trade_profit if gem['name'] == gem_name else gem for gem in profits_data])
+                logger.info('✓ Upgraded %s to trade site data', gem_name)
                 
                 # Return success message and updated table
-                success_msg = dbc.Alert(
-                    f"✓ Updated {gem_name} with trade site prices! Button now shows 'Gamba?' for corruption analysis.",
-                    color="success",
-                    dismissable=True,
-                    duration=4000
-                )
-                return success_msg, create_table_data(False)
+                return upgrade_alert(gem_name, True), create_table_data(False), True
             else:
                 # Failed to fetch trade prices
-                error_msg = dbc.Alert(
-                    f"✗ Could not fetch trade site prices for {gem_name}. Try again in a moment.",
-                    color="danger",
-                    dismissable=True,
-                    duration=4000
-                )
-                return error_msg, dash.no_update
+                return upgrade_alert(gem_name, False), dash.no_update, True
     
     # This is a "Gamba?" button - show corruption analysis
-    # Check cache first
-    if gem_name in corruption_cache:
-        print(f"Using cached corruption data for {gem_name}")
-        corruption_data = corruption_cache[gem_name]
-    else:
-        # Calculate corruption EV and cache it
-        print(f"Fetching corruption data for {gem_name}")
-        corruption_data = calculator.calculate_corruption_ev(gem_name, gem_data)
-        
-        if not corruption_data:
-            return dbc.Alert("Could not fetch corruption prices from trade site. Try again in a moment.", color="warning"), dash.no_update
-        
-        # Cache the data
-        corruption_cache[gem_name] = corruption_data
+    corruption_data = cached_corruption_ev(gem_name, gem_data)
+    if not corruption_data:
+        return CORRUPTION_FAILED_ALERT, dash.no_update, True
     
-    # Calculate comparison
-    comparison = corruption_data['ev_profit'] - corruption_data['base_profit']
-    comparison_text = f"+{comparison:.1f}c" if comparison > 0 else f"{comparison:.1f}c"
-    comparison_color = '#00ff00' if comparison > 0 else '#ff0000'
+    # Repeat clicks and currency toggles reuse the already-serialized card
+    league = calculator.api.league
+    card_key = (gem_name, league, currency_mode, calculator.divine_rate)
+    cached_card = analysis_card_cache.get(card_key)
+    if cached_card and cached_card[0] is corruption_data:
+        current_analysis_gem = gem_name
+        return cached_card[1], dash.no_update, True
     
-    # Calculate comparison
-    comparison = corruption_data['ev_profit'] - corruption_data['base_profit']
-    comparison_text = f"+{comparison:.1f}c" if comparison > 0 else f"{comparison:.1f}c"
-    comparison_color = '#00ff00' if comparison > 0 else '#ff0000'
-    
-    # Create analysis card
-    analysis_card = dbc.Card([
-        dbc.CardHeader([
-            html.H6(f"🎰 Corruption Analysis: {gem_name}", className="mb-0")
-        ]),
-        dbc.CardBody([
-            dbc.Row([
-                # Corruption Analysis (full width, aligned left)
-                dbc.Col([
-                    html.H6("🔮 Corruption EV", className="mb-2"),
-                    html.Div([
-                        html.Div([
-                            html.Span("• No Effect (33%): ", style={'fontSize': '0.9em'}),
-                            html.Span(format_price(corruption_data['outcomes']['l5_no_change'], currency_mode), 
-                                     style={'fontSize': '0.9em', 'fontWeight': 'bold'}),
-                            html.Span("  ", style={'marginRight': '10px'}),
-                            html.Span("• +1 Lvl (17%): ", style={'fontSize': '0.9em'}),
-                            html.Span(format_price(corruption_data['outcomes']['l6'], currency_mode), 
-                                     style={'fontSize': '0.9em', 'fontWeight': 'bold'}),
-                            html.Span("  ", style={'marginRight': '10px'}),
-                            html.Span("• -1 Lvl (17%): ", style={'fontSize': '0.9em'}),
-                            html.Span(format_price(corruption_data['outcomes']['l4'], currency_mode), 
-                                     style={'fontSize': '0.9em', 'fontWeight': 'bold'}),
-                            html.Span("  ", style={'marginRight': '10px'}),
-                            html.Span("• Q+ (17%): ", style={'fontSize': '0.9em'}),
-                            html.Span(format_price(corruption_data['outcomes']['quality_up'], currency_mode), 
-                                     style={'fontSize': '0.9em', 'fontWeight': 'bold'}),
-                            html.Span("  ", style={'marginRight': '10px'}),
-                            html.Span("• Q- (17%): ", style={'fontSize': '0.9em'}),
-                            html.Span(format_price(corruption_data['outcomes']['quality_down'], currency_mode), 
-                                     style={'fontSize': '0.9em', 'fontWeight': 'bold'})
-                        ], className="mb-2"),
-                        html.Hr(className="my-2"),
-                        html.Div([
-                            html.B("EV: ", style={'fontSize': '0.9em', 'color': '#00ff00' if corruption_data['ev_profit'] > 0 else '#ff0000'}),
-                            html.B(f"{format_price(corruption_data['ev_profit'], currency_mode)} ({corruption_data['ev_percent']:.1f}%)", 
-                                   style={'fontSize': '0.9em', 'color': '#00ff00' if corruption_data['ev_profit'] > 0 else '#ff0000'}),
-                            html.Br(),
-                            html.Small(f"vs Base: {comparison_text}", style={'fontSize': '0.85em', 'color': comparison_color})
-                        ])
-                    ])
-                ], width=12)
-            ]),
-            html.Hr(),
-            dbc.Row([
-                dbc.Col([
-                    html.Small("Uncorrupted:", className="text-muted d-inline me-2"),
-                    html.A("🔍 L1 Q0", 
-                           href=f"https://www.pathofexile.com/trade/search/{calculator.api.league}?q={{%22query%22:{{%22status%22:{{%22option%22:%22available%22}},%22type%22:%22{gem_name}%22,%22filters%22:{{%22misc_filters%22:{{%22filters%22:{{%22gem_level%22:{{%22min%22:1,%22max%22:1}},%22quality%22:{{%22min%22:0,%22max%22:0}},%22corrupted%22:{{%22option%22:%22false%22}}}}}}}}}}}}",
-                           target="_blank", className="me-2"),
-                    html.A("🔍 L5 Q20",
-                           href=f"https://www.pathofexile.com/trade/search/{calculator.api.league}?q={{%22query%22:{{%22status%22:{{%22option%22:%22available%22}},%22type%22:%22{gem_name}%22,%22filters%22:{{%22misc_filters%22:{{%22filters%22:{{%22gem_level%22:{{%22min%22:5,%22max%22:5}},%22quality%22:{{%22min%22:20,%22max%22:20}},%22corrupted%22:{{%22option%22:%22false%22}}}}}}}}}}}}",
-                           target="_blank", className="me-3"),
-                    html.Span("| ", className="text-muted me-2"),
-                    html.Small("Corrupted:", className="text-muted d-inline me-2"),
-                    html.A("🔍 L5 Q20", 
-                           href=f"https://www.pathofexile.com/trade/search/{calculator.api.league}?q={{%22query%22:{{%22status%22:{{%22option%22:%22available%22}},%22type%22:%22{gem_name}%22,%22filters%22:{{%22misc_filters%22:{{%22filters%22:{{%22gem_level%22:{{%22min%22:5,%22max%22:5}},%22quality%22:{{%22min%22:20,%22max%22:20}},%22corrupted%22:{{%22option%22:%22true%22}}}}}}}}}}}}",
-                           target="_blank", className="me-2"),
-                    html.A("🔍 L6 Q20",
-                           href=f"https://www.pathofexile.com/trade/search/{calculator.api.league}?q={{%22query%22:{{%22status%22:{{%22option%22:%22available%22}},%22type%22:%22{gem_name}%22,%22filters%22:{{%22misc_filters%22:{{%22filters%22:{{%22gem_level%22:{{%22min%22:6,%22max%22:6}},%22quality%22:{{%22min%22:20,%22max%22:20}},%22corrupted%22:{{%22option%22:%22true%22}}}}}}}}}}}}",
-                           target="_blank")
-                ], width=12)
-            ], className="mt-2")
-        ])
-    ], color="dark", outline=True)
+    analysis_card = build_analysis_card(gem_name, corruption_data, league, currency_mode)
     
     # Store which gem is currently displayed for currency toggle updates
     current_analysis_gem = gem_name
     
-    return analysis_card, dash.no_update
+    # Serialize once; Dash sends the plain dict without walking the component tree again
+    card_json = orjson.loads(to_json_plotly(analysis_card))
+    analysis_card_cache[card_key] = (corruption_data, card_json)
+    return card_json, dash.no_update, True
 
 
-# Clientside callback to handle footer show/hide animations
+# Clientside callback to open the L1 Q0 trade search when a gem name is clicked (no server round-trip)
 app.clientside_callback(
     """
-    function(analysis_content, close_clicks, show_clicks) {
-        const footer = document.getElementById('gem-analysis-footer');
-        const mainContent = document.getElementById('main-content');
-        const spacer = document.getElementById('footer-spacer');
-        const showBtn = document.getElementById('show-analysis-container');
-        const closeBtn = document.getElementById('close-analysis-btn');
-        
-        if (!footer || !mainContent || !spacer || !showBtn || !closeBtn) {
-            return window.dash_clientside.no_update;
-        }
-        
-        // Determine which button was clicked
-        const ctx = window.dash_clientside.callback_context;
-        if (!ctx.triggered.length) {
-            return window.dash_clientside.no_update;
-        }
-        
-        const triggeredId = ctx.triggered[0].prop_id.split('.')[0];
-        
-        // If close button clicked, hide footer
-        if (triggeredId === 'close-analysis-btn') {
-            footer.style.bottom = '-50vh';
-            spacer.style.height = '0px';
-            showBtn.style.display = 'block';
-            closeBtn.style.display = 'none';
-            return window.dash_clientside.no_update;
-        }
-        
-        // If show button clicked, show footer
-        if (triggeredId === 'show-analysis-btn') {
-            footer.style.bottom = '0';
-            spacer.style.height = '35vh';
-            showBtn.style.display = 'none';
-            closeBtn.style.display = 'block';
+    function(active_cell, rows, url_template) {
+        if (!active_cell || active_cell.column_id !== 'Gem' || !rows || !rows[active_cell.row]) {
             return window.dash_clientside.no_update;
         }
         
-        // If gem-analysis content changed (new analysis), show footer
-        if (triggeredId === 'gem-analysis' && analysis_content && analysis_content.props && analysis_content.props.children) {
-            footer.style.bottom = '0';
-            spacer.style.height = '35vh';
-            showBtn.style.display = 'none';
-            closeBtn.style.display = 'block';
-        }
-        
-        return window.dash_clientside.no_update;
+        const gem = JSON.stringify(rows[active_cell.row].gem_name).slice(1, -1);
+        const url = url_template.replace('{gem}', encodeURIComponent(gem));
+        window.open(url, '_blank');
+        return url;
     }
     """,
-    Output('gem-analysis-footer', 'style', allow_duplicate=True),
-    Input('gem-analysis', 'children'),
+    Output('trade-link-opened', 'data'),
+    Input('gem-table', 'active_cell'),
+    State('gem-table', 'derived_viewport_data'),
+    State('trade-url-l1q0', 'data'),
+    prevent_initial_call=True
+)
+
+
+# Clientside callbacks to handle footer show/hide animations (assets/analysis_footer.js).
+# Neither receives the analysis card itself - a new analysis only flips the analysis-present flag.
+app.clientside_callback(
+    ClientsideFunction(namespace='footer', function_name='buttons'),
+    Output('footer-dummy', 'data'),
     Input('close-analysis-btn', 'n_clicks'),
     Input('show-analysis-btn', 'n_clicks'),
     prevent_initial_call=True
 )
 
+app.clientside_callback(
+    ClientsideFunction(namespace='footer', function_name='analysis'),
+    Output('footer-dummy', 'data', allow_duplicate=True),
+    Input('analysis-present', 'data'),
+    prevent_initial_call=True
+)
+
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 10000))  # Render uses port 10000 by default
+    # Only reached with DASH_DEV set or without gunicorn (e.g. on Windows) - see the top of this file
     print(f"Starting PoE Gem Profit Calculator...")
-    print(f"Listening on port {port}")
-    app.run_server(host='0.0.0.0', port=port, debug=False)
+    print(f"Listening on port {port} (Flask server)")
+    app.run_server(host='0.0.0.0', port=port, debug=False, threaded=True)